@@ -0,0 +1,146 @@
+import os
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+from settings import decode_threads
+
+# Shared image cache. Every image in the game is loaded through here, so each
+# distinct surface is only decoded and scaled once. Keys are (path, size, flip)
+image_cache = {}
+
+# Decoded and scaled images that haven't been converted to the display's
+# pixel format yet. Decoding doesn't need the display, so it can be done
+# ahead of time on another thread. Same keys as image_cache
+decoded_cache = {}
+
+# Threads that decode images in parallel. pygame releases the GIL while it
+# loads and scales images, so they run on separate cores. Threads are only
+# started the first time they're needed
+decode_pool = ThreadPoolExecutor(decode_threads or os.cpu_count())
+
+# Number of cache hits and misses. Useful for checking that nothing is
+# being reloaded every frame
+cache_stats = {'hits': 0, 'misses': 0}
+
+
+# Decode an image, scaling it to size (width, height) and flipping it
+# horizontally if required, without converting it for the display. Safe to
+# call from a worker thread. Scaled and flipped surfaces are built from the
+# cached unscaled/unflipped surface, so the file is only read once
+def decode_image(path, size = None, flip = False):
+	key = (path, size, flip)
+	surface = decoded_cache.get(key)
+
+	if surface is None:
+		if flip:
+			surface = pygame.transform.flip(decode_image(path, size), True, False)
+		elif size is not None:
+			surface = pygame.transform.scale(decode_image(path), size)
+		else:
+			surface = pygame.image.load(path)
+		decoded_cache[key] = surface
+
+	return surface
+
+
+# Decode each of the images of one file, as (path, size, flip) keys
+def decode_file(keys):
+	for path, size, flip in keys:
+		decode_image(path, size, flip)
+
+
+# Decode a set of (path, size, flip) images on the decode threads, waiting
+# for them all to finish. Images of the same file are decoded by the same
+# thread, so each file is still only read once. Images that have already
+# been decoded are skipped. Safe to call from a worker thread
+def decode_images(keys):
+	files = {}
+	for key in keys:
+		if key not in decoded_cache:
+			files.setdefault(key[0], []).append(key)
+
+	# Unflipped images first, as flipped ones are made from them
+	futures = [decode_pool.submit(decode_file, sorted(file_keys, key = lambda key: key[2])) for file_keys in files.values()]
+	for future in futures:
+		future.result()
+
+
+# Candidate colorkeys for images with binary alpha. The first one not used
+# by any of an image's visible pixels is used
+colorkeys = [(255, 0, 255), (0, 255, 255), (255, 255, 0), (1, 2, 3)]
+
+
+# Work out how an image uses alpha: 'opaque' if every pixel is fully opaque,
+# 'binary' if every pixel is either fully opaque or fully transparent, or
+# 'translucent' if any pixel is partly transparent
+def alpha_type(surface):
+	if not surface.get_flags() & pygame.SRCALPHA:
+		return 'opaque'
+
+	# Masks of pixels with any alpha, and of fully opaque pixels
+	visible = pygame.mask.from_surface(surface, 0).count()
+	opaque = pygame.mask.from_surface(surface, 254).count()
+	if opaque == surface.get_width() * surface.get_height():
+		return 'opaque'
+	if opaque == visible:
+		return 'binary'
+	return 'translucent'
+
+
+# Return a colorkey not used by any of an image's visible pixels, or None if
+# all of the candidates are used
+def unused_colorkey(surface, candidates = colorkeys):
+	visible = pygame.mask.from_surface(surface, 0)
+	for colorkey in candidates:
+		matching = pygame.mask.from_threshold(surface, colorkey, (1, 1, 1, 255))
+		if not visible.overlap_area(matching, (0, 0)):
+			return colorkey
+	return None
+
+
+# Convert an image to the display's pixel format, in the format fastest to
+# blit for how it uses alpha. Opaque images lose their alpha channel, so
+# are copied without blending. Images with binary alpha use a colorkey and
+# are RLE encoded, so transparent runs are skipped. Only images with
+# partly transparent pixels keep per-pixel alpha. Must be called on the
+# main thread
+def convert_image(surface):
+	type = alpha_type(surface)
+	if type == 'opaque':
+		return surface.convert()
+
+	colorkey = unused_colorkey(surface) if type == 'binary' else None
+	if colorkey is None:
+		return surface.convert_alpha()
+
+	# Transparent pixels are filled with the colorkey. Visible pixels are
+	# fully opaque, so are copied exactly
+	keyed = pygame.Surface(surface.get_size()).convert()
+	keyed.fill(colorkey)
+	keyed.blit(surface, (0, 0))
+	keyed.set_colorkey(colorkey, pygame.RLEACCEL)
+	return keyed
+
+
+# Load an image, scaled and flipped as for decode_image, and converted for
+# fast drawing to the display (see convert_image). Must be called on the
+# main thread
+def load_image(path, size = None, flip = False):
+	key = (path, size, flip)
+	surface = image_cache.get(key)
+
+	if surface is not None:
+		cache_stats['hits'] += 1
+		return surface
+
+	cache_stats['misses'] += 1
+	surface = convert_image(decode_image(path, size, flip))
+	image_cache[key] = surface
+	return surface
+
+
+# Empty the cache, eg, when the tile size changes
+def clear_cache():
+	image_cache.clear()
+	decoded_cache.clear()
+	cache_stats['hits'] = 0
+	cache_stats['misses'] = 0
@@ -0,0 +1,147 @@
+import os, json, struct
+import pygame
+from settings import tile_size, asset_cache_folder
+from assets import decoded_cache
+
+# Atlas files pack every decoded image for one tile size into a single
+# image, so later launches load one file and slice it up rather than
+# decoding and scaling each PNG. Layout (little-endian):
+#   Header: magic (4 bytes), format version (u16), tile size (u16),
+#     atlas width (u32), atlas height (u32), index length in bytes (u32)
+#   Index: JSON list of [path, size, flip, x, y, width, height], one entry
+#     per image, with the same path, size and flip as the image cache keys
+#   Pixels: the atlas as RGBA bytes, row by row
+magic = b'PATL'
+format_version = 1
+header_format = '<4sHHIII'
+header_size = struct.calcsize(header_format)
+min_atlas_width = 1024
+
+# Keys of the images loaded from the atlas, so it's only written again if
+# something new has been decoded since
+atlas_keys = set()
+
+
+# Path of the atlas for the current tile size
+def atlas_path():
+	return os.path.join(asset_cache_folder, f'atlas_{tile_size}.bin')
+
+
+# Arrange images in rows, tallest first, each row as tall as its first
+# image. The atlas is at least as wide as the widest image. Returns the
+# (x, y) position of each image and the atlas width and height
+def pack(sizes):
+	atlas_width = max([min_atlas_width] + [width for width, height in sizes.values()])
+	positions = {}
+	x = y = row_height = 0
+	for key, (width, height) in sorted(sizes.items(), key = lambda item: -item[1][1]):
+		if x + width > atlas_width:
+			x = 0
+			y += row_height
+			row_height = 0
+		positions[key] = (x, y)
+		x += width
+		row_height = max(row_height, height)
+	return positions, atlas_width, y + row_height
+
+
+# Write a dictionary of (path, size, flip) keys to decoded images to an
+# atlas file. Pixels are copied row by row, so they're stored exactly,
+# with no blending
+def write_atlas(images, path):
+	sizes = {key: surface.get_size() for key, surface in images.items()}
+	positions, atlas_width, height = pack(sizes)
+	pixels = bytearray(atlas_width * height * 4)
+	index = []
+
+	for key, surface in images.items():
+		image_path, size, flip = key
+		x, y = positions[key]
+		width, image_height = sizes[key]
+		data = pygame.image.tobytes(surface, 'RGBA')
+		row_length = width * 4
+		for row in range(image_height):
+			start = ((y + row) * atlas_width + x) * 4
+			pixels[start:start + row_length] = data[row * row_length:(row + 1) * row_length]
+		index.append([image_path, size, flip, x, y, width, image_height])
+
+	index_data = json.dumps(index).encode('utf-8')
+	os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+	with open(path, 'wb') as file:
+		file.write(struct.pack(header_format, magic, format_version, tile_size, atlas_width, height, len(index_data)))
+		file.write(index_data)
+		file.write(pixels)
+
+
+# Load an atlas file. Returns a dictionary of (path, size, flip) keys to
+# images, each a subsurface of the atlas. Returns None if there's no atlas
+# for this tile size, or any of its images has changed since it was written
+def load_atlas(path):
+	if not os.path.exists(path):
+		return None
+
+	with open(path, 'rb') as file:
+		data = file.read()
+
+	file_magic, version, atlas_tile_size, width, height, index_length = struct.unpack_from(header_format, data, 0)
+	if file_magic != magic or version != format_version or atlas_tile_size != tile_size:
+		return None
+
+	index = json.loads(data[header_size:header_size + index_length])
+	atlas_time = os.path.getmtime(path)
+	for image_path in {entry[0] for entry in index}:
+		if not os.path.exists(image_path) or os.path.getmtime(image_path) > atlas_time:
+			return None
+
+	atlas = pygame.image.frombuffer(memoryview(data)[header_size + index_length:], (width, height), 'RGBA')
+	images = {}
+	for image_path, size, flip, x, y, image_width, image_height in index:
+		key = (image_path, tuple(size) if size else None, flip)
+		images[key] = atlas.subsurface((x, y, image_width, image_height))
+	return images
+
+
+# Fill the image cache from the atlas for this tile size, if there is one.
+# Images in it then don't need to be decoded or scaled
+def load_cached_atlas():
+	images = load_atlas(atlas_path())
+	if images:
+		decoded_cache.update(images)
+		atlas_keys.update(images)
+
+
+# Write every decoded image to the atlas for this tile size, if any have
+# been decoded since it was loaded. Called on exit, so the first run builds
+# the atlas automatically
+def save_cached_atlas():
+	images = dict(decoded_cache)
+	if set(images) - atlas_keys:
+		write_atlas(images, atlas_path())
+		atlas_keys.update(images)
+
+
+if __name__ == '__main__':
+	from argparse import ArgumentParser
+	from level_data import build_level
+	from support import load_level_layouts
+	from preload import level_images
+	from assets import decode_images
+
+	parser = ArgumentParser(description = "Build the atlas of every level's images for the current tile size")
+	parser.add_argument('--root', default = '../levels', help = 'folder containing the levels')
+	args = parser.parse_args()
+
+	# Only levels with level data (the test level 0 and levels 1-10) can be
+	# played
+	levels = sorted(int(name) for name in os.listdir(args.root) if name.isdigit())
+	for value in levels:
+		level_data = build_level(value, args.root)
+		if 'fill_image' not in level_data:
+			continue
+
+		# Images a level refers to but that don't exist are left out by
+		# level_images, and will fail to load as usual when they're used
+		decode_images(level_images(level_data, load_level_layouts(level_data)))
+
+	write_atlas(dict(decoded_cache), atlas_path())
+	print(f'{len(decoded_cache)} images for tile size {tile_size} -> {atlas_path()}')
@@ -0,0 +1,198 @@
+import os, sys, json, time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from statistics import mean, median
+
+# Headless runner sets SDL's dummy video driver before pygame is imported
+from headless import create_headless_level
+from settings import replay_folder
+from level_data import build_level
+from replay import load_replay, read_replay_header, check_tile_size
+
+
+# Run one job headless in a worker process: a level played from a replay's
+# inputs, or with no input for max_ticks if there's no replay. Each job is
+# (level, replay path, max ticks, levels folder, tile size), where tile size
+# is the one the replay was recorded at, or None to use this machine's.
+# Returns a dictionary of the job's results. A job that fails is reported
+# as an error rather than stopping the batch
+def run_job(job):
+	try:
+		return play_job(job)
+	except Exception as error:
+		level_id, replay_path, max_ticks, root, tile_size = job
+		return {'level': level_id, 'replay': replay_path, 'outcome': 'error', 'error': repr(error)}
+
+
+def play_job(job):
+	level_id, replay_path, max_ticks, root, tile_size = job
+	if replay_path:
+		level_id, tile_size, inputs = load_replay(replay_path)
+		check_tile_size(replay_path, tile_size)
+		max_ticks = len(inputs)
+	else:
+		inputs = None
+
+	start = time.perf_counter()
+	level = create_headless_level(build_level(level_id, root))
+	load_time = time.perf_counter() - start
+
+	# Time each tick
+	tick_times = []
+	while level.ticks < max_ticks and level.status != 'start_overworld':
+		start = time.perf_counter()
+		level.step(inputs[level.ticks] if inputs else 0)
+		tick_times.append(time.perf_counter() - start)
+
+	# Game over is either reaching the portal with all corn collected, or
+	# dying. Timeout is running out of ticks (or replay) first
+	player = level.player.sprite
+	if not player.game_over:
+		outcome = 'timeout'
+	elif level.corn_count == level.corn_total and level.portal.sprite and level.portal.sprite.rect.colliderect(player.rect):
+		outcome = 'completed'
+	else:
+		outcome = 'died'
+
+	tick_times.sort()
+	return {
+		'level': level_id,
+		'replay': replay_path,
+		'outcome': outcome,
+		'ticks': level.ticks,
+		'ticks_to_finish': level.game_over_timer if player.game_over else None,
+		'corn': level.corn_count,
+		'corn_total': level.corn_total,
+		'player': list(player.rect.topleft),
+		'load_seconds': load_time,
+		'tick_ms': {
+			'mean': mean(tick_times) * 1000,
+			'p50': median(tick_times) * 1000,
+			'p95': tick_times[int(len(tick_times) * 0.95)] * 1000,
+			'max': tick_times[-1] * 1000,
+		} if tick_times else None,
+	}
+
+
+# Job for a replay, taking its level and tile size from the replay's
+# header. A replay whose header can't be read is still run, so that its
+# error is reported
+def replay_job(path, root):
+	try:
+		level_id, tile_size = read_replay_header(path)
+	except (OSError, ValueError):
+		level_id = tile_size = None
+	return (level_id, path, None, root, tile_size)
+
+
+# Set the tile size of worker processes started from now on (see
+# settings.py). None leaves it to the screen's size
+def set_worker_tile_size(tile_size):
+	if tile_size is None:
+		os.environ.pop('TILE_SIZE', None)
+	else:
+		os.environ['TILE_SIZE'] = str(tile_size)
+
+
+# Run every job over pools of worker processes, one pool per tile size the
+# jobs need. Jobs with no tile size run at this machine's. Returns the
+# results in the same order as the jobs
+def run_batch(jobs, workers = None):
+	groups = {}
+	for index, job in enumerate(jobs):
+		groups.setdefault(job[4], []).append(index)
+
+	# Workers are started fresh rather than forked, so each one sets up
+	# pygame itself, at the tile size set when its pool is created
+	results = [None] * len(jobs)
+	machine_tile_size = os.environ.get('TILE_SIZE')
+	try:
+		for tile_size, indices in groups.items():
+			set_worker_tile_size(tile_size if tile_size is not None else machine_tile_size)
+			with ProcessPoolExecutor(workers, mp_context = get_context('spawn')) as executor:
+				for index, result in zip(indices, executor.map(run_job, [jobs[index] for index in indices])):
+					results[index] = result
+	finally:
+		set_worker_tile_size(machine_tile_size)
+	return results
+
+
+# Find every replay file in a list of files and folders
+def find_replays(paths):
+	replays = []
+	for path in paths:
+		if os.path.isdir(path):
+			replays += sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.rpl'))
+		else:
+			replays.append(path)
+	return replays
+
+
+# Key identifying a job's result, to match it with the baseline's
+def job_key(result):
+	return (result['level'], result['replay'])
+
+
+# Print each job whose outcome, ticks to finish, corn collected or final
+# player position differ from a previous report. Returns the number of
+# differences
+def compare(results, baseline_path):
+	with open(baseline_path) as file:
+		baseline = {job_key(result): result for result in json.load(file)['results']}
+
+	differences = 0
+	for result in results:
+		old = baseline.get(job_key(result))
+		if old is None:
+			continue
+		for key in ['outcome', 'ticks_to_finish', 'corn', 'player']:
+			if result.get(key) != old.get(key):
+				differences += 1
+				print(f'level {result["level"]} {result["replay"] or ""}: {key} {old.get(key)} -> {result.get(key)}')
+	return differences
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description = 'Run levels and replays headless over a pool of processes')
+	parser.add_argument('replays', nargs = '*', help = 'replay files or folders of them (default: the replays folder)')
+	parser.add_argument('--levels', type = int, nargs = '*', default = [], help = 'levels to also run with no input')
+	parser.add_argument('--ticks', type = int, default = 3600, help = 'ticks to run levels with no input for')
+	parser.add_argument('--root', default = '../levels', help = 'folder containing the levels')
+	parser.add_argument('--workers', type = int, default = os.cpu_count(), help = 'number of worker processes')
+	parser.add_argument('--output', default = 'batch_report.json', help = 'file to write the report to')
+	parser.add_argument('--baseline', help = 'previous report to check results against')
+	args = parser.parse_args()
+
+	replays = args.replays
+	if not replays and os.path.isdir(replay_folder):
+		replays = [replay_folder]
+
+	jobs = [(level_id, None, args.ticks, args.root, None) for level_id in args.levels]
+	jobs += [replay_job(path, args.root) for path in find_replays(replays)]
+
+	start = time.perf_counter()
+	results = run_batch(jobs, args.workers)
+	elapsed = time.perf_counter() - start
+
+	for result in results:
+		if result['outcome'] == 'error':
+			print(f'level {result["level"]} {result["replay"] or "(no input)"}: {result["error"]}')
+			continue
+		tick_ms = result['tick_ms']['mean'] if result['tick_ms'] else 0
+		print(f'level {result["level"]} {result["replay"] or "(no input)"}: {result["outcome"]} after {result["ticks"]} ticks, corn {result["corn"]}/{result["corn_total"]}, {tick_ms:.3f}ms/tick')
+	print(f'{len(jobs)} jobs on {args.workers} workers in {elapsed:.2f}s')
+
+	with open(args.output, 'w') as file:
+		json.dump({
+			'workers': args.workers,
+			'seconds': elapsed,
+			'results': results,
+		}, file, indent = 2)
+
+	# Exit with an error if any job failed or anything changed since the
+	# baseline, so a regression sweep can fail a build
+	failed = any(result['outcome'] == 'error' for result in results)
+	changed = args.baseline and compare(results, args.baseline)
+	if failed or changed:
+		sys.exit(1)
@@ -0,0 +1,6 @@
+# Level performance benchmarks. Run from the code folder with:
+#   python -m benchmarks.run
+# and the memory each level holds with:
+#   python -m benchmarks.memory
+# and the blit speed of each image in the format chosen for it with:
+#   python -m benchmarks.blit
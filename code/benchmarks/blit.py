@@ -0,0 +1,55 @@
+import os, sys, time
+from argparse import ArgumentParser
+
+# Headless runner sets SDL's dummy video driver before pygame is imported
+import headless
+import pygame
+from settings import tile_size, screen_width, screen_height
+from assets import decode_image, alpha_type, convert_image
+
+
+# Blits per second of an image drawn repeatedly onto a surface
+def blit_rate(image, target, blits):
+	positions = [((index * 7) % (target.get_width() - image.get_width()), (index * 13) % (target.get_height() - image.get_height())) for index in range(blits)]
+	start = time.perf_counter()
+	target.blits([(image, position) for position in positions], False)
+	return blits / (time.perf_counter() - start)
+
+
+# Compare the blit rate of every image in a folder (and its subfolders),
+# scaled to one tile, with per-pixel alpha as every image used to be
+# converted, against the format chosen for it by convert_image
+def benchmark_images(root, blits):
+	target = pygame.display.set_mode((screen_width, screen_height))
+	results = []
+	for folder, _, files in sorted(os.walk(root)):
+		for name in sorted(files):
+			if not name.endswith('.png'):
+				continue
+			decoded = decode_image(os.path.join(folder, name), (tile_size, tile_size))
+			results.append({
+				'image': os.path.relpath(os.path.join(folder, name), root),
+				'alpha': alpha_type(decoded),
+				'per_pixel_alpha': blit_rate(decoded.convert_alpha(), target, blits),
+				'chosen': blit_rate(convert_image(decoded), target, blits),
+			})
+	return results
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description = "Compare blit speed of each image with per-pixel alpha against the format convert_image chooses")
+	parser.add_argument('--root', default = '../graphics', help = 'folder of images')
+	parser.add_argument('--blits', type = int, default = 50000, help = 'blits to time per image and format')
+	args = parser.parse_args()
+
+	results = benchmark_images(args.root, args.blits)
+	for result in results:
+		print(f'{result["image"]:<28}{result["alpha"]:<13}{result["per_pixel_alpha"]:>10.0f} -> {result["chosen"]:>10.0f} blits/s ({result["chosen"] / result["per_pixel_alpha"]:.2f}x)')
+
+	# Total time to draw every image once, in each format
+	old = sum(1 / result['per_pixel_alpha'] for result in results)
+	new = sum(1 / result['chosen'] for result in results)
+	print(f'all images: {old / new:.2f}x blit throughput')
+
+	pygame.quit()
+	sys.exit()
@@ -0,0 +1,76 @@
+import os
+from random import Random
+from level_data import layer_names
+
+
+# Generate a synthetic stress level cols tiles wide.
+# The player walks right along solid ground with fill below it, collecting
+# items. Ledges above the ground carry patrolling enemies, and moving
+# platforms patrol higher up, each between a pair of constraint tiles.
+# Densities are the chance of placing each feature at a given column.
+# Moving platforms and the portal are only placed if their graphics exist,
+# so levels still load on a checkout without them. The same seed gives the
+# same level either way, apart from those.
+# Levels are written to root/value/ so they can be loaded with build_level
+def generate_level(root, value, cols, rows = 11, enemy_density = 0.05, platform_density = 0.02, item_density = 0.1, seed = 0):
+	random = Random(seed)
+	has_platforms = os.path.exists('../graphics/platforms/0.png')
+	has_portal = os.path.exists('../graphics/portal/0.png')
+	layers = {name: [['-1'] * cols for _ in range(rows)] for name in layer_names}
+
+	ground_row = rows - 3
+	walk_row = ground_row - 1
+	ledge_row = ground_row - 3
+	platform_row = 2
+
+	# Ground and fill across the whole level. Terrain alternates between
+	# the two terrain tiles
+	for col in range(cols):
+		layers['terrain'][ground_row][col] = str(col % 2)
+		for row in range(ground_row + 1, rows):
+			layers['fill'][row][col] = '0'
+
+	# Player start and portal at either end of the level
+	layers['player'][walk_row][1] = '0'
+	if has_portal:
+		layers['player'][walk_row][cols - 2] = '1'
+
+	col = 4
+	while col < cols - 8:
+
+		# Items along the walkway
+		if random.random() < item_density:
+			layers['items'][walk_row][col] = '0'
+
+		# Ledge with an enemy patrolling between constraints at each end
+		if random.random() < enemy_density:
+			width = random.randint(3, 6)
+			for ledge_col in range(col, col + width):
+				layers['terrain'][ledge_row][ledge_col] = '0'
+			layers['constraints'][ledge_row - 1][col - 1] = '0'
+			layers['constraints'][ledge_row - 1][col + width] = '0'
+			layers['enemies'][ledge_row - 1][col + random.randrange(width)] = '0'
+			col += width + 2
+			continue
+
+		# Moving platform between constraints. Platform value 0 moves
+		# horizontally
+		if random.random() < platform_density and has_platforms:
+			width = random.randint(3, 6)
+			layers['constraints'][platform_row][col - 1] = '0'
+			layers['constraints'][platform_row][col + width] = '0'
+			layers['platforms'][platform_row][col] = '0'
+			col += width + 2
+			continue
+
+		col += 1
+
+	# Write each layer to its .csv file, in the same format that Tiled
+	# exports and import_csv_layout reads
+	folder = os.path.join(root, str(value))
+	os.makedirs(folder, exist_ok = True)
+	for name, layout in layers.items():
+		with open(os.path.join(folder, f'level_{value}_{name}.csv'), 'w') as file:
+			file.write('\n'.join(','.join(row) for row in layout))
+
+	return folder
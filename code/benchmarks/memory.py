@@ -0,0 +1,61 @@
+import sys, gc, tempfile, tracemalloc
+from argparse import ArgumentParser
+
+# Headless runner sets SDL's dummy video driver before pygame is imported
+from headless import create_headless_level
+import pygame
+from level_data import build_level
+from benchmarks.generator import generate_level
+
+
+# Leave out tracemalloc's own allocations
+snapshot_filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+
+
+# Create a level and measure the Python memory it holds on to once loaded.
+# The level is loaded once beforehand, so images are already cached and
+# only the level's own structures are counted. Image pixels are allocated
+# by SDL, so tracemalloc doesn't see them either way.
+# Returns the level, the bytes it holds and the top lines allocating them
+def level_memory(level_data, top = 5):
+	create_headless_level(level_data)
+	gc.collect()
+
+	tracemalloc.start()
+	before = tracemalloc.take_snapshot().filter_traces(snapshot_filters)
+	level = create_headless_level(level_data)
+	gc.collect()
+	after = tracemalloc.take_snapshot().filter_traces(snapshot_filters)
+	tracemalloc.stop()
+
+	stats = after.compare_to(before, 'lineno')
+	total = sum(stat.size_diff for stat in stats)
+	return level, total, [(str(stat.traceback), stat.size_diff) for stat in stats[:top]]
+
+
+# Print one level's memory, per cell of the level and by line allocated
+def report(name, level_data, top):
+	level, total, lines = level_memory(level_data, top)
+	cells = level.terrain_map.rows * level.terrain_map.cols
+	print(f'{name}: {total / 1024:.1f}KiB for {cells} cells, {total / cells:.1f} bytes/cell')
+	for location, size in lines:
+		print(f'  {size / 1024:>10.1f}KiB  {location}')
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description = 'Report the memory each level holds once loaded, using tracemalloc')
+	parser.add_argument('--sizes', type = int, nargs = '*', default = [1000, 10000], help = 'widths in tiles of generated levels to measure')
+	parser.add_argument('--levels', type = int, nargs = '*', default = [], help = 'numbers of levels in the levels folder to also measure')
+	parser.add_argument('--top', type = int, default = 5, help = 'number of allocating lines to list per level')
+	args = parser.parse_args()
+
+	for value in args.levels:
+		report(f'level {value}', build_level(value), args.top)
+
+	with tempfile.TemporaryDirectory() as root:
+		for cols in args.sizes:
+			generate_level(root, 1, cols)
+			report(f'{cols} cols', build_level(1, root), args.top)
+
+	pygame.quit()
+	sys.exit()
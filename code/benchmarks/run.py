@@ -0,0 +1,126 @@
+import sys, json, time, platform, tempfile, tracemalloc, resource
+from argparse import ArgumentParser
+from statistics import mean, median
+
+# Headless runner sets SDL's dummy video driver before pygame is imported
+from headless import create_headless_level
+import pygame
+import controls
+from settings import tile_size
+from level_data import build_level
+from profiler import profiler
+from benchmarks.generator import generate_level
+
+
+# Inputs for the benchmark run. Player walks right the whole time,
+# scrolling through the level
+def benchmark_input(tick):
+	return controls.right
+
+
+# Load and run one generated level. Returns a dictionary of results
+def benchmark_level(root, value, cols, frames, densities):
+	generate_level(root, value, cols, **densities)
+
+	# Time level loading, and measure peak memory allocated while loading
+	tracemalloc.start()
+	start = time.perf_counter()
+	level = create_headless_level(build_level(value, root))
+	load_time = time.perf_counter() - start
+	_, peak_memory = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	# Time each frame, stepping and rendering to the offscreen surface.
+	# The profiler times each subsystem within the frame
+	profiler.enabled = True
+	profiler.reset()
+	frame_times = []
+	for tick in range(frames):
+		start = time.perf_counter()
+		level.step(benchmark_input(tick))
+		level.render(level.display_surface)
+		frame_times.append(time.perf_counter() - start)
+
+	profiler.enabled = False
+	frame_times.sort()
+	return {
+		'cols': cols,
+		'densities': densities,
+		'tiles': {
+			'terrain': level.terrain_map.count(),
+			'fill': level.fill_map.count(),
+			'items': level.corn_total,
+			'enemies': len(level.enemy_sprites),
+			'platforms': len(level.platform_sprites),
+		},
+		'load_seconds': load_time,
+		'load_peak_memory_bytes': peak_memory,
+		'max_rss_kilobytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+		'frames': frames,
+		'frame_ms': {
+			'mean': mean(frame_times) * 1000,
+			'p50': median(frame_times) * 1000,
+			'p95': frame_times[int(len(frame_times) * 0.95)] * 1000,
+			'max': frame_times[-1] * 1000,
+		},
+		'subsystem_ms': {name: total / frames * 1000 for name, total in profiler.totals.items()},
+	}
+
+
+# Print percentage change of each size's mean frame and load time
+# against a previous results file
+def compare(results, baseline_path):
+	with open(baseline_path) as file:
+		baseline = {result['cols']: result for result in json.load(file)['results']}
+
+	for result in results:
+		old = baseline.get(result['cols'])
+		if old is None:
+			continue
+		for key, new_value, old_value in [
+			('frame', result['frame_ms']['mean'], old['frame_ms']['mean']),
+			('load', result['load_seconds'], old['load_seconds']),
+		]:
+			change = (new_value - old_value) / old_value * 100
+			print(f'{result["cols"]:>7} cols {key}: {change:+.1f}%')
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description = 'Benchmark level loading and frame time on generated levels')
+	parser.add_argument('--sizes', type = int, nargs = '+', default = [1000, 10000, 100000], help = 'level widths in tiles')
+	parser.add_argument('--frames', type = int, default = 600, help = 'frames to run per level')
+	parser.add_argument('--enemy-density', type = float, default = 0.05)
+	parser.add_argument('--platform-density', type = float, default = 0.02)
+	parser.add_argument('--item-density', type = float, default = 0.1)
+	parser.add_argument('--seed', type = int, default = 0)
+	parser.add_argument('--output', default = 'benchmark_results.json', help = 'file to write results to')
+	parser.add_argument('--baseline', help = 'previous results file to compare against')
+	args = parser.parse_args()
+
+	densities = {
+		'enemy_density': args.enemy_density,
+		'platform_density': args.platform_density,
+		'item_density': args.item_density,
+		'seed': args.seed,
+	}
+
+	results = []
+	with tempfile.TemporaryDirectory() as root:
+		for cols in args.sizes:
+			result = benchmark_level(root, 1, cols, args.frames, densities)
+			results.append(result)
+			print(f'{cols:>7} cols: load {result["load_seconds"]:.3f}s, frame {result["frame_ms"]["mean"]:.3f}ms (p95 {result["frame_ms"]["p95"]:.3f}ms)')
+
+	with open(args.output, 'w') as file:
+		json.dump({
+			'python': platform.python_version(),
+			'pygame': pygame.version.ver,
+			'tile_size': tile_size,
+			'results': results,
+		}, file, indent = 2)
+
+	if args.baseline:
+		compare(results, args.baseline)
+
+	pygame.quit()
+	sys.exit()
@@ -0,0 +1,42 @@
+import pygame
+from settings import screen_width, screen_height
+
+class Camera:
+
+	def __init__(self):
+
+		# World shift is how far the world scrolled this frame. Total world
+		# shift is how far it has scrolled since the level started. Sprites
+		# keep their world position and are translated by this when drawn
+		self.world_shift = 0
+		self.total_world_shift = 0
+
+
+	# Scroll the world by shift pixels. Only Level.scroll_x should call this
+	def scroll(self, shift):
+		self.world_shift = shift
+		self.total_world_shift += shift
+
+
+	# Convert a rect in world coordinates to screen coordinates
+	def apply(self, rect):
+		return rect.move(self.total_world_shift, 0)
+
+
+	# Area of the world currently shown on screen
+	def viewport(self):
+		return pygame.Rect(-self.total_world_shift, 0, screen_width, screen_height)
+
+
+	# Draw every on-screen sprite in a group at its screen position. Sprites
+	# outside the viewport are skipped
+	def draw(self, group, surface):
+		viewport = self.viewport()
+		self.blit([sprite for sprite in group.sprites() if viewport.colliderect(sprite.rect)], surface)
+
+
+	# Draw sprites already known to be on screen at their screen positions,
+	# as one batch
+	def blit(self, sprites, surface):
+		offset = self.total_world_shift
+		surface.blits([(sprite.image, sprite.rect.move(offset, 0)) for sprite in sprites], False)
@@ -0,0 +1,47 @@
+# Sweep a rect along one axis (0 for x, 1 for y) by distance, against
+# obstacles given as (start rect, end rect, owner). Obstacles can move
+# along the same axis at the same time (eg, moving platforms), so each is
+# tested against the rect's motion relative to it. Nothing is passed
+# through, however far either moves in one tick. Obstacles the rect
+# already overlaps are ignored, and touching one while moving towards it
+# counts as hitting it.
+# Returns the rect's new position along the axis, the side it was stopped
+# on (1 moving in the positive direction, -1 negative, 0 if it wasn't) and
+# the owner of the obstacle that stopped it
+def sweep(rect, axis, distance, obstacles):
+	if axis == 0:
+		start, size = rect.x, rect.width
+		cross_start, cross_end = rect.top, rect.bottom
+	else:
+		start, size = rect.y, rect.height
+		cross_start, cross_end = rect.left, rect.right
+
+	position = start + distance
+	side = 0
+	stopped_by = None
+
+	for obstacle_start, obstacle_end, owner in obstacles:
+		if axis == 0:
+			near, far, moved = obstacle_start.left, obstacle_start.right, obstacle_end.x - obstacle_start.x
+			obstacle_cross_start, obstacle_cross_end = obstacle_start.top, obstacle_start.bottom
+		else:
+			near, far, moved = obstacle_start.top, obstacle_start.bottom, obstacle_end.y - obstacle_start.y
+			obstacle_cross_start, obstacle_cross_end = obstacle_start.left, obstacle_start.right
+
+		# Obstacles beside the rect's path can't be hit
+		if obstacle_cross_start >= cross_end or obstacle_cross_end <= cross_start:
+			continue
+
+		# Stop against the obstacle's near side at the end of the tick
+		relative = distance - moved
+		if relative > 0 and start + size <= near <= start + size + relative:
+			limit = near + moved - size
+			if side == 0 or limit < position:
+				position, side, stopped_by = limit, 1, owner
+
+		elif relative < 0 and start >= far >= start + relative:
+			limit = far + moved
+			if side == 0 or limit > position:
+				position, side, stopped_by = limit, -1, owner
+
+	return position, side, stopped_by
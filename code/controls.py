@@ -0,0 +1,22 @@
+import pygame
+
+# Player inputs. Each tick's input is a bitmask made up of these, so the
+# level can be driven by the keyboard, a script or a recording
+left = 1
+right = 2
+jump = 4
+
+
+# Read current keyboard state into an input bitmask
+def read_keyboard():
+	keys = pygame.key.get_pressed()
+	inputs = 0
+
+	if keys[pygame.K_LEFT]:
+		inputs |= left
+	if keys[pygame.K_RIGHT]:
+		inputs |= right
+	if keys[pygame.K_SPACE]:
+		inputs |= jump
+
+	return inputs
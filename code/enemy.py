@@ -1,65 +1,42 @@
-import pygame
-from tiles import Tile, AnimatedTile
-from support import import_folder
-from settings import screen_ratio
-
-class Enemy(Tile):
-
-	def __init__(self, width, height, x, y, direction, speed, surface):
-		super().__init__(width, height, x, y)
-		self.direction = direction
-		self.speed = int(screen_ratio * speed)
-		self.image = surface
-
-
-	# Move enemy. If direction is 0 (horizontal), move along x axis.
-	# If direction is 1 (vertical), move along y axis
-	def move(self):
-		if self.direction == 0:
-			self.rect.x += self.speed
-		elif self.direction == 1:
-			self.rect.y += self.speed
-
-
-	# Reverse enemy direction when they collide with constraints.
-	# If enemy direction is horizontal, flip image
-	def reverse_direction(self):
-		self.speed *= -1
-		if self.direction == 0:
-			self.image = pygame.transform.flip(self.image, True, False)
-
-
-	def update(self, shift):
-		self.rect.x += shift
-		self.move()
-
-
-class AnimatedEnemy(Enemy):
-
-	def __init__(self, width, height, x, y, direction, speed, surface, path_index):
-		super().__init__(width, height, x, y, direction, speed, surface)
-		self.path = '../graphics/enemies/' + str(path_index)
-		self.frames = import_folder(self.path)
-		self.frame_index = 0
-		self.image = self.frames[self.frame_index]
-		self.width = width
-		self.height = height
-
-
-	def animate(self):
-
-		self.frame_index += 0.15
-		if self.frame_index >= len(self.frames):
-			self.frame_index = 0
-		self.image = self.frames[int(self.frame_index)]
-		self.image = pygame.transform.scale(self.image, (self.width, self.height))
-		print(self.direction)
-		if self.speed > 0:
-			self.image = pygame.transform.flip(self.image, True, False)
-
-
-
-	def update(self, shift):
-		self.rect.x += shift
-		self.animate()
-		self.move()
+from entities import PatrolSprite
+from support import import_folder
+from assets import load_image
+from settings import screen_ratio
+
+class Enemy(PatrolSprite):
+
+	# Enemy that patrols back and forth. Its position and speed are kept in
+	# the level's enemy store, which moves it
+	def __init__(self, width, height, x, y, direction, speed, path, store):
+		super().__init__(width, height, x, y, direction, int(screen_ratio * speed), store)
+		self.path = path
+		self.size = (width, height)
+
+		# Image facing each way. Horizontal enemies are flipped while moving left
+		if path is not None:
+			self.right_image = load_image(path, self.size)
+			self.left_image = load_image(path, self.size, True)
+
+
+	@property
+	def image(self):
+		return self.left_image if self.store.flipped[self.index] else self.right_image
+
+
+class AnimatedEnemy(Enemy):
+
+	def __init__(self, width, height, x, y, direction, speed, path_index, store):
+		super().__init__(width, height, x, y, direction, speed, None, store)
+		self.frames_path = '../graphics/enemies/' + str(path_index)
+		self.frames = import_folder(self.frames_path, self.size)
+		self.flipped_frames = import_folder(self.frames_path, self.size, True)
+		self.width = width
+		self.height = height
+		store.set_animation(self.index, len(self.frames))
+
+
+	# Current animation frame. Faces right while moving right
+	@property
+	def image(self):
+		frames = self.flipped_frames if self.store.flipped[self.index] else self.frames
+		return frames[int(self.store.frame[self.index])]
@@ -1,15 +1,15 @@
-# List of enemy attributes:
-# Index 0: Animated (0 - False, 1 - True)
-# Index 1: Width
-# Index 2: Height
-# Index 3: Direction (0 - Horizontal, 1 - Vertical)
-# Index 4: Speed
-
-enemy_list = [
-	[0, 1, 1, 0, 3],	# Spike
-	[1, 1, 1, 1, 3],	# Bee
-	[0, 1, 1, 0, 4],	# Sand spike
-	[1, 1, 1, 1, 4],	# Ocean bee
-	[1, 1, 2, 0, 3],	# Sea monster
-	[1, 1, 1, 0, 0],	# Water tile
+# List of enemy attributes:
+# Index 0: Animated (0 - False, 1 - True)
+# Index 1: Width
+# Index 2: Height
+# Index 3: Direction (0 - Horizontal, 1 - Vertical)
+# Index 4: Speed
+
+enemy_list = [
+	[0, 1, 1, 0, 3],	# Spike
+	[1, 1, 1, 1, 3],	# Bee
+	[0, 1, 1, 0, 4],	# Sand spike
+	[1, 1, 1, 1, 4],	# Ocean bee
+	[1, 1, 2, 0, 3],	# Sea monster
+	[1, 1, 1, 0, 0],	# Water tile
 ]
\ No newline at end of file
@@ -0,0 +1,279 @@
+import pygame
+import numpy as np
+from settings import tick_rate, animation_fps
+
+class EntityStore:
+
+	# Positions, speeds, directions and patrol ranges of a level's patrolling
+	# sprites (enemies or moving platforms), held in NumPy arrays with one
+	# element per sprite. With many sprites, every sprite moves, reverses and
+	# animates in a few vectorized operations per tick, so the cost of a tick
+	# barely depends on how many there are. Below vector_threshold sprites,
+	# NumPy's per-call overhead costs more than it saves, so they're stepped
+	# one at a time instead. The sprites themselves are thin views that read
+	# their rect and speed from here (see PatrolSprite)
+	vector_threshold = 32
+
+	# Each array: (name, type, value of an unused element)
+	# Last x and y are the position before the latest step, for working out
+	# how far each sprite moved. Direction 0 moves horizontally, 1
+	# vertically. Speed is signed.
+	# Patrol range is along the direction of movement, and is infinite on a
+	# side with no constraint. Frame count is 0 for sprites that aren't
+	# animated. Flipped is whether the sprite faces the other way
+	fields = [
+		('x', np.int64, 0),
+		('y', np.int64, 0),
+		('last_x', np.int64, 0),
+		('last_y', np.int64, 0),
+		('width', np.int64, 0),
+		('height', np.int64, 0),
+		('direction', np.int8, 0),
+		('speed', np.int64, 0),
+		('min_bound', np.float64, -np.inf),
+		('max_bound', np.float64, np.inf),
+		('frame', np.float64, 0),
+		('frame_count', np.int64, 0),
+		('flipped', np.bool_, False),
+	]
+
+	def __init__(self, capacity = 64):
+		self.count = 0
+		self.sprites = []
+		for name, type, empty in self.fields:
+			setattr(self, name, np.full(capacity, empty, type))
+
+		# Rect of each sprite by index, built when first asked for and kept
+		# until the sprites next move
+		self.rects = {}
+
+
+	# Add a sprite, growing the arrays if they're full, and set its index
+	def add(self, sprite, x, y, width, height, direction, speed):
+		if self.count == len(self.x):
+			for name, type, empty in self.fields:
+				array = getattr(self, name)
+				grown = np.full(len(array) * 2, empty, type)
+				grown[:self.count] = array[:self.count]
+				setattr(self, name, grown)
+
+		index = self.count
+		self.x[index] = x
+		self.y[index] = y
+		self.last_x[index] = x
+		self.last_y[index] = y
+		self.width[index] = width
+		self.height[index] = height
+		self.direction[index] = direction
+		self.speed[index] = speed
+
+		sprite.index = index
+		self.sprites.append(sprite)
+		self.count += 1
+
+
+	# Remove a sprite. The last sprite takes its place, so removing doesn't
+	# depend on how many there are. Returns the sprite's values, which
+	# restore puts back
+	def remove(self, sprite):
+		index = sprite.index
+		last = self.count - 1
+		values = []
+		for name, type, empty in self.fields:
+			array = getattr(self, name)
+			values.append(array[index])
+			array[index] = array[last]
+			array[last] = empty
+
+		moved = self.sprites.pop()
+		if moved is not sprite:
+			self.sprites[index] = moved
+			moved.index = index
+		self.count -= 1
+		sprite.index = None
+		self.rects = {}
+		return values
+
+
+	# Add a removed sprite back, with the values remove returned
+	def restore(self, sprite, values):
+		x, y, last_x, last_y, width, height, direction, speed = values[:8]
+		self.add(sprite, x, y, width, height, direction, speed)
+		for (name, type, empty), value in zip(self.fields, values):
+			getattr(self, name)[sprite.index] = value
+
+
+	def set_patrol(self, index, min_bound, max_bound):
+		self.min_bound[index] = min_bound
+		self.max_bound[index] = max_bound
+
+
+	def set_animation(self, index, frame_count):
+		self.frame_count[index] = frame_count
+
+
+	# Rect of a sprite. It's shared until the sprites next move, so must not
+	# be changed
+	def rect(self, index):
+		rect = self.rects.get(index)
+		if rect is None:
+			rect = pygame.Rect(int(self.x[index]), int(self.y[index]), int(self.width[index]), int(self.height[index]))
+			self.rects[index] = rect
+		return rect
+
+
+	# Rect of a sprite before the latest step
+	def last_rect(self, index):
+		return pygame.Rect(int(self.last_x[index]), int(self.last_y[index]), int(self.width[index]), int(self.height[index]))
+
+
+	# Return indices of the sprites overlapping a rect, in order
+	def indices_in(self, rect):
+		count = self.count
+		if count < self.vector_threshold:
+			return [index for index in range(count) if self.rect(index).colliderect(rect)]
+
+		x, y = self.x[:count], self.y[:count]
+		overlapping = (x < rect.right) & (x + self.width[:count] > rect.left) & (y < rect.bottom) & (y + self.height[:count] > rect.top)
+		return np.flatnonzero(overlapping)
+
+
+	# Return the sprites overlapping a rect, in order
+	def sprites_in(self, rect):
+		return [self.sprites[index] for index in self.indices_in(rect)]
+
+
+	# Advance every sprite by one tick. Animated sprites move on to their next
+	# frame, facing the way they're moving. Then each sprite moves along its
+	# direction, and any that have moved past their patrol range reverse.
+	# Sprites that aren't animated are flipped while moving left
+	def step(self):
+		self.rects = {}
+		if self.count < self.vector_threshold:
+			self.step_each()
+			return
+
+		count = self.count
+		horizontal = self.direction[:count] == 0
+		speed = self.speed[:count]
+
+		animated = self.frame_count[:count] > 0
+		frame = self.frame[:count]
+		frame[animated] += animation_fps / tick_rate
+		frame[animated & (frame >= self.frame_count[:count])] = 0
+		self.flipped[:count][animated] = speed[animated] > 0
+
+		x, y = self.x[:count], self.y[:count]
+		self.last_x[:count] = x
+		self.last_y[:count] = y
+		x += np.where(horizontal, speed, 0)
+		y += np.where(horizontal, 0, speed)
+
+		start = np.where(horizontal, x, y)
+		end = start + np.where(horizontal, self.width[:count], self.height[:count])
+		reverse = ((speed > 0) & (end > self.max_bound[:count])) | ((speed < 0) & (start < self.min_bound[:count]))
+		speed[reverse] *= -1
+
+		self.flipped[:count][~animated] = horizontal[~animated] & (speed[~animated] < 0)
+
+
+	# Same as step, one sprite at a time on lists of the values
+	def step_each(self):
+		count = self.count
+		x, y = self.x[:count].tolist(), self.y[:count].tolist()
+		speed = self.speed[:count].tolist()
+		frame, flipped = self.frame[:count].tolist(), self.flipped[:count].tolist()
+		direction, frame_count = self.direction[:count].tolist(), self.frame_count[:count].tolist()
+		width, height = self.width[:count].tolist(), self.height[:count].tolist()
+		min_bound, max_bound = self.min_bound[:count].tolist(), self.max_bound[:count].tolist()
+		frame_step = animation_fps / tick_rate
+
+		self.last_x[:count] = self.x[:count]
+		self.last_y[:count] = self.y[:count]
+
+		for index in range(count):
+			sprite_speed = speed[index]
+			animated = frame_count[index] > 0
+			if animated:
+				frame[index] += frame_step
+				if frame[index] >= frame_count[index]:
+					frame[index] = 0
+				flipped[index] = sprite_speed > 0
+
+			if direction[index] == 0:
+				x[index] += sprite_speed
+				start = x[index]
+				end = start + width[index]
+			else:
+				y[index] += sprite_speed
+				start = y[index]
+				end = start + height[index]
+
+			if (sprite_speed > 0 and end > max_bound[index]) or (sprite_speed < 0 and start < min_bound[index]):
+				sprite_speed = -sprite_speed
+				speed[index] = sprite_speed
+
+			if not animated:
+				flipped[index] = direction[index] == 0 and sprite_speed < 0
+
+		self.x[:count] = x
+		self.y[:count] = y
+		self.speed[:count] = speed
+		self.frame[:count] = frame
+		self.flipped[:count] = flipped
+
+
+class PatrolSprite(pygame.sprite.Sprite):
+
+	# Sprite that patrols back and forth, whose position, speed and patrol
+	# range are kept in an EntityStore. Its rect is read from the store, and
+	# mustn't be changed: the sprite is moved by the store.
+	# Once the sprite has been added to a group, it's in the store for as
+	# long as it's in any group. Removing it from its last group (by kill,
+	# Group.remove or Group.empty) removes it from the store, and adding it
+	# to a group again puts it back as it was
+	def __init__(self, width, height, x, y, direction, speed, store):
+		super().__init__()
+		self.direction = direction
+		self.store = store
+		self.removed_values = None
+		store.add(self, x, y, width, height, direction, speed)
+
+
+	@property
+	def rect(self):
+		return self.store.rect(self.index)
+
+
+	@property
+	def speed(self):
+		return int(self.store.speed[self.index])
+
+
+	def set_patrol(self, min_bound, max_bound):
+		self.store.set_patrol(self.index, min_bound, max_bound)
+
+
+	# (min, max) positions the sprite patrols between, along its direction
+	def patrol_bounds(self):
+		return float(self.store.min_bound[self.index]), float(self.store.max_bound[self.index])
+
+
+	def add_internal(self, group):
+		super().add_internal(group)
+		if self.index is None:
+			self.store.restore(self, self.removed_values)
+
+
+	def remove_internal(self, group):
+		super().remove_internal(group)
+		if not self.alive() and self.index is not None:
+			self.removed_values = self.store.remove(self)
+
+
+	# Remove the sprite from its groups and from its store. Sprite.kill
+	# doesn't call remove_internal
+	def kill(self):
+		if self.index is not None:
+			self.removed_values = self.store.remove(self)
+		super().kill()
@@ -0,0 +1,64 @@
+import os, sys, time
+from argparse import ArgumentParser
+
+# Use SDL's dummy video driver so no display is needed. This has to be set
+# before pygame is initialised in settings.py
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+import controls
+from settings import screen_width, screen_height
+from level import Level
+from level_data import build_level
+
+
+# Create a level without a window. A video mode still has to be set so
+# that images can be converted, but with the dummy driver nothing is shown
+def create_headless_level(level_data):
+	surface = pygame.display.set_mode((screen_width, screen_height))
+	return Level(level_data, surface, 'level')
+
+
+# Step a level as fast as possible, with no frame rate limit, until it
+# finishes or max_ticks is reached. input_source is called with the tick
+# number and returns that tick's input bitmask. If render is set, every
+# tick is also drawn to the (offscreen) display surface.
+# Returns the number of ticks run per second
+def run_headless(level, max_ticks, input_source = None, render = False):
+	start = time.perf_counter()
+
+	while level.ticks < max_ticks and level.status != 'start_overworld':
+		if input_source:
+			level.step(input_source(level.ticks))
+		else:
+			level.step(0)
+		if render:
+			level.render(level.display_surface)
+
+	elapsed = time.perf_counter() - start
+	if elapsed == 0:
+		return 0
+	return level.ticks / elapsed
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description = 'Run a level headless, as fast as possible')
+	parser.add_argument('level', type = int, help = 'level number')
+	parser.add_argument('--ticks', type = int, default = 10000, help = 'maximum number of ticks to run')
+	parser.add_argument('--hold', nargs = '*', default = [], choices = ['left', 'right', 'jump'], help = 'inputs held down every tick')
+	parser.add_argument('--render', action = 'store_true', help = 'also draw every tick to an offscreen surface')
+	args = parser.parse_args()
+
+	# Combine held inputs into one bitmask
+	held = 0
+	for name in args.hold:
+		held |= getattr(controls, name)
+
+	level = create_headless_level(build_level(args.level))
+	ticks_per_second = run_headless(level, args.ticks, lambda tick: held, args.render)
+
+	player = level.player.sprite
+	print(f'level {args.level}: {level.ticks} ticks at {ticks_per_second:.0f} ticks/s')
+	print(f'status: {level.status}, game over: {player.game_over}, corn: {level.corn_count}/{level.corn_total}, player: {player.rect.topleft}')
+	pygame.quit()
+	sys.exit()
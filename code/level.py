@@ -1,409 +1,610 @@
-import pygame
-from tiles import Tile, StaticTile, MovingTile, AnimatedTile
-from settings import tile_size, screen_width, screen_height
-from player import Player
-from support import import_csv_layout
-from enemy import Enemy, AnimatedEnemy
-from enemy_data import enemy_list
-
-class Level:
-
-	def __init__(self, level_data, surface, status):
-
-		# Level setup
-		self.display_surface = surface
-		self.level_data = level_data
-		self.status = status
-		self.game_over_timer = 0
-
-		# World shift variables. Used for determining if player reaches
-		# end of the screen
-		self.world_length = 0
-		self.world_shift = 0
-		self.total_world_shift = 0
-		
-		# Player and portal setup
-		player_layout = import_csv_layout(level_data['player'])
-		self.player = pygame.sprite.GroupSingle()
-		self.portal = pygame.sprite.GroupSingle()
-		self.player_setup(player_layout)
-
-		# Terrain setup
-		terrain_layout = import_csv_layout(level_data['terrain'])
-		self.terrain_sprites = self.create_tile_group(terrain_layout, 'terrain')
-
-		# Terrain setup
-		platform_layout = import_csv_layout(level_data['platforms'])
-		self.platform_sprites = self.create_tile_group(platform_layout, 'platforms')
-
-		# Fill setup. Used for filling screen with tiles that look solid but
-		# are only used for fill, so that needless collision calls aren't used
-		fill_layout = import_csv_layout(level_data['fill'])
-		self.fill_sprites = self.create_tile_group(fill_layout, 'fill')
-
-		# Items setup (eg, corn)
-		item_layout = import_csv_layout(level_data['items'])
-		self.item_sprites = self.create_tile_group(item_layout, 'items')
-
-		# Enemy setup
-		enemy_layout = import_csv_layout(level_data['enemies'])
-		self.enemy_sprites = self.create_tile_group(enemy_layout, 'enemies')
-
-		# Constraints. Used for setting enemy movement to a specific path
-		constraint_layout = import_csv_layout(level_data['constraints'])
-		self.constraint_sprites = self.create_tile_group(constraint_layout, 'constraint')
-
-		# Corn count. This tracks the number of corn collected and the total number
-		# available. The font will be used to display the score on the screen
-		self.corn_count = 0
-		self.corn_total = len(self.item_sprites.sprites())
-		self.font = pygame.font.SysFont('Consolas', int(tile_size / 2))
-
-	
-	def create_tile_group(self, layout, type):
-		sprite_group = pygame.sprite.Group()
-		self.world_length = len(layout[0] * tile_size)
-
-		for row_index, row in enumerate(layout):
-			for col_index, val in enumerate(row):
-
-				# If tile value is -1, it's an empty tile (eg, sky)
-				if val != '-1':
-					x = col_index * tile_size
-					y = row_index * tile_size
-
-					# If tile is terrain or item, create a static tile.
-					if type == 'terrain' or type == 'items':
-						image = pygame.image.load(f'../graphics/{type}/{val}.png').convert_alpha()
-						image = pygame.transform.scale(image, (tile_size, tile_size))
-						sprite = StaticTile(tile_size, tile_size, x, y, image)
-
-					# If tile is platform, create a moving tile.
-					elif type == 'platforms':
-						image = pygame.image.load(f'../graphics/{type}/{val}.png').convert_alpha()
-						image = pygame.transform.scale(image, (tile_size, tile_size))
-						sprite = MovingTile(tile_size, tile_size, x, y, image, int(val) % 2)
-
-					# If tile is fill, create static tile using the image specified in level_data
-					elif type == 'fill':
-						image = pygame.image.load(self.level_data['fill_image']).convert_alpha()
-						image = pygame.transform.scale(image, (tile_size, tile_size))
-						sprite = StaticTile(tile_size, tile_size, x, y, image)
-
-					# If tile is enemy, create an enemy tile
-					elif type == 'enemies':
-
-						image_width = tile_size * enemy_list[int(val)][1]
-						image_height = tile_size * enemy_list[int(val)][2]
-
-						# If enemy data value is 0, load static sprite
-						if enemy_list[int(val)][0] == 0:
-							image = pygame.image.load(f'../graphics/{type}/{val}.png').convert_alpha()
-							image = pygame.transform.scale(image, (image_width, image_height))
-							sprite = Enemy(image_width, image_height, x, y, enemy_list[int(val)][3], enemy_list[int(val)][4], image)
-
-						# If enemy data value is 1, load animated sprite
-						elif enemy_list[int(val)][0] == 1:
-							sprite = AnimatedEnemy(image_width, image_height, x, y, enemy_list[int(val)][3], enemy_list[int(val)][4], None, int(val))
-
-					# If tile is constraint, create a blank, imageless tile
-					elif type == 'constraint':
-						sprite = Tile(tile_size, tile_size, x, y)
-
-					sprite_group.add(sprite)
-		
-		return sprite_group
-
-
-	def player_setup(self, layout):
-		for row_index, row in enumerate(layout):
-			for col_index, val in enumerate(row):
-				x = col_index * tile_size
-				y = row_index * tile_size
-
-				# If tile value is 0, it's the player starting point
-				if val == '0':
-					
-					# Make player slightly smaller than tile size. This is to prevent
-					# random collision glitches. These occur when player enters a narrow
-					# tunnel and can't jump
-					sprite = Player((x, y), tile_size - int(tile_size / 6))
-					self.player.add(sprite)
-
-				# If tile value is 1, it's the level finish point (the portal)
-				elif val == '1':
-					sprite = AnimatedTile(tile_size, tile_size, x, y, None, 'portal/')
-					self.portal.add(sprite)
-
-
-	# If enemy collides with constraint tile, enemy reverses direction
-	def enemy_collision_reverse(self):
-		for enemy in self.enemy_sprites.sprites():
-			if pygame.sprite.spritecollide(enemy, self.constraint_sprites, False):
-				enemy.reverse_direction()
-
-
-	# If moving platform collides with constraint tile, platform reverses direction
-	def platform_collision_reverse(self):
-		for platform in self.platform_sprites.sprites():
-			if pygame.sprite.spritecollide(platform, self.constraint_sprites, False):
-				platform.reverse_direction()
-
-
-	# Used to scroll player and the surrounding world
-	def scroll_x(self):
-		player = self.player.sprite
-
-		# If left side of player reaches left side of level, turn off player
-		# left movement. Allow pixel buffer (this is because player is
-		# updated before this function and can therefore slightly go off-screen)
-		if player.rect.x <= self.total_world_shift + player.max_speed:
-			player.can_move_left = False
-
-		# If right side of player reaches right side of level, turn off player
-		# right movement
-		elif player.rect.right >= screen_width - player.max_speed:
-			player.can_move_right = False
-
-		# Shift screen left:
-		# If center of player reaches center of screen, and player is facing left, and the world 
-		# shift is not at zero (meaning the screen is not at its leftmost point), begin shifting 
-		# world and keep player in center of screen
-		elif player.rect.centerx < screen_width / 2 and player.direction.x < 0 and self.total_world_shift != 0:
-			self.world_shift = player.max_speed
-			player.current_speed = 0
-			
-		# Shift screen right:
-		# Same as above function, but this instead checks that the length of the world minus the 
-		# width of the screen is less than the total shift (meaning the screen is not at its
-		# rightmost point)
-		elif player.rect.centerx > screen_width - (screen_width / 2) and player.direction.x > 0 and abs(self.total_world_shift) < self.world_length - screen_width:
-			self.world_shift = -player.max_speed
-			player.current_speed = 0
-
-		# Else, player must therefore be idle
-		else:
-			self.world_shift = 0
-			player.current_speed = player.max_speed
-
-		self.total_world_shift += self.world_shift
-
-
-	# Check for horizontal collision between player and solid tiles
-	def horizontal_movement_collision(self):
-		player = self.player.sprite
-		player.rect.x += player.direction.x * player.current_speed
-
-		for sprite in self.terrain_sprites.sprites():
-
-			# Draw black rectangle around each terrain tile
-			pygame.draw.rect(self.display_surface, (0, 0, 0), sprite, 1)
-
-			if sprite.rect.colliderect(player.rect):
-
-				# Set player's left/right side to match that of the
-				# the tile they've just collided with
-				if player.direction.x < 0:
-
-					player.direction.x = 0
-					player.rect.centerx = sprite.rect.right + tile_size / 2
-					if player.direction.y > 0:
-						player.on_ground = False
-
-				elif player.direction.x > 0:
-
-					player.direction.x = 0
-					player.rect.centerx = sprite.rect.left - tile_size / 2
-					if player.direction.y > 0:
-						player.on_ground = False
-
-
-	# Check for vertical collision between player and solid tiles
-	def vertical_movement_collision(self):
-		player = self.player.sprite
-		player.apply_gravity()
-
-		for sprite in self.terrain_sprites.sprites():
-
-			if sprite.rect.colliderect(player.rect):
-
-				# If player lands on tile, set player's y movement to 0
-				# Set on_ground to True so that they can jump again
-				# If player is on moving platform, add buffer for vertical collision
-				# so that player doesn't warp to top of static tile. This will keep
-				# player on moving platform
-				if player.direction.y > 0:
-					if player.on_platform == True:
-						player.rect.bottom = sprite.rect.top + tile_size / 8
-					else:
-						player.rect.bottom = sprite.rect.top
-					player.direction.y = 0
-					player.on_ground = True
-
-				# If player hits tile from underneath, set player's
-				# y movement to 0
-				elif player.direction.y < 0:
-					player.rect.top = sprite.rect.bottom
-					player.direction.y = 0
-
-	# Check for collision between player and moving platforms
-	def platform_collision(self):
-		player = self.player.sprite
-
-		for sprite in self.platform_sprites.sprites():
-
-			# Draw black rectangle around each terrain tile
-			pygame.draw.rect(self.display_surface, (0, 0, 0), sprite, 1)
-
-			if sprite.rect.colliderect(player.rect):
-				
-				# In each collision (left, right, top, bottom), allow
-				# a 1/3 tile-buffer to account for the moving tile. This
-				# is because the tiles move faster than the update()
-				# functions are called, causing player to sometimes
-				# warp through tile
-				if abs(player.rect.left - sprite.rect.right) < tile_size / 3:
-					player.rect.left = sprite.rect.right
-
-				elif abs(player.rect.right - sprite.rect.left) < tile_size / 3:
-					player.rect.right = sprite.rect.left
-
-				# Add 2 to player's y direction so that they bounce off
-				# tile after colliding with it from underneath
-				elif abs(player.rect.top - sprite.rect.bottom) < tile_size / 3:
-					player.direction.y += 2
-					player.rect.top = sprite.rect.bottom
-
-				# When player lands on moving platform
-				elif abs(player.rect.bottom - sprite.rect.top) < tile_size / 3:
-					player.direction.y = 0
-					player.on_ground = True
-					player.on_platform = True
-
-					# If platform is horizontally moving, match player's
-					# rect.x position with tile's speed so that player
-					# remains standing on it
-					if sprite.direction == 0:
-						player.rect.x += sprite.speed
-
-					# If platform is vertically moving, allow 1 and 3 pixels
-					# depending on its direction so that player remains
-					# standing smoothly on it. Without that, player will shake
-					elif sprite.direction == 1:
-
-						if sprite.speed > 0:
-							player.rect.bottom = sprite.rect.top + sprite.speed + 1
-						
-						elif sprite.speed < 0:
-							player.rect.bottom = sprite.rect.top + sprite.speed + 3
-
-			else:
-				player.on_platform = False
-
-
-	# Check for collision between player and items such as corn
-	def item_collision(self):
-		player = self.player.sprite
-		for sprite in self.item_sprites.sprites():
-			if sprite.rect.colliderect(player.rect):
-				sprite.kill()
-				self.corn_count += 1
-
-
-	# Check for collision between player and enemies
-	def enemy_collision(self):
-		player = self.player.sprite
-
-		# If player falls off screen, it's game over
-		if player.rect.top > screen_height:
-			player.game_over = True
-			player.direction.y = 0
-
-		# If player collides with enemy, it's game over
-		else:
-			for sprite in self.enemy_sprites.sprites():
-				if sprite.rect.colliderect(player.rect):
-					player.game_over = True
-					player.speed = 0
-
-
-	# Check for collision between player and portal
-	def portal_collision(self):
-		player = self.player.sprite
-		if self.portal.sprite.rect.colliderect(player.rect):
-			player.game_over = True
-			player.speed = 0
-
-
-	# Check for game over condition
-	def check_game_over(self):
-		player = self.player.sprite
-
-		# If game over has been activated, get current pygame time
-		if player.game_over and self.game_over_timer == 0:
-			self.game_over_timer = pygame.time.get_ticks()
-
-		# After 1500ms, set status back to overworld
-		if pygame.time.get_ticks() > self.game_over_timer + 1500 and self.game_over_timer != 0:
-			self.status = 'start_overworld'
-
-
-	# Draw player's current score in top-left corner of screen
-	def draw_inventory(self):
-		image = pygame.image.load('../graphics/items/0.png').convert_alpha()
-		image = pygame.transform.scale(image, (int(tile_size / 2), (int(tile_size / 2))))
-		self.display_surface.blit(image, (image.get_width() / 2, image.get_height() / 2))
-		score = str(self.corn_count) + '/' + str(self.corn_total)
-		score_display = self.font.render(score, True, (0, 0, 0))
-		self.display_surface.blit(score_display, (tile_size + image.get_width() / 2, image.get_height() / 2))
-
-
-	# Main level function for looping through all sprite and tile updates,
-	# as well as drawing all images to screen
-	def run(self):
-		
-		# Draw terrain and file tiles
-		self.terrain_sprites.update(self.world_shift)
-		self.terrain_sprites.draw(self.display_surface)
-		self.platform_sprites.update(self.world_shift)
-		self.platform_sprites.draw(self.display_surface)
-		self.platform_collision_reverse()
-		self.fill_sprites.update(self.world_shift)
-		self.fill_sprites.draw(self.display_surface)
-
-		# Draw black rectangle around each fill tile
-		for sprite in self.fill_sprites.sprites():
-			pygame.draw.rect(self.display_surface, (0, 0, 0), sprite, 1)
-
-		# Draw item tiles and check for collision
-		self.item_sprites.update(self.world_shift)
-		self.item_sprites.draw(self.display_surface)
-		self.item_collision()
-
-		# Draw portal tile and check for collision. Only draw portal
-		# once all corn is collected
-		self.portal.update(self.world_shift)
-		if self.corn_count == self.corn_total:
-			self.portal.draw(self.display_surface)
-			self.portal_collision()
-
-		# Update/draw player, scroll screen, check for tile collision
-		self.player.update()
-		self.scroll_x()
-		self.horizontal_movement_collision()
-		self.vertical_movement_collision()
-		self.platform_collision()
-		self.player.draw(self.display_surface)
-
-		# Update/draw enemies and check for constraint collision
-		self.enemy_sprites.update(self.world_shift)
-		self.constraint_sprites.update(self.world_shift)
-		self.enemy_collision_reverse()
-		self.enemy_sprites.draw(self.display_surface)
-		self.enemy_collision()
-
-		# Check if game over has been activated
-		self.check_game_over()
-
-		# Draw score on screen
-		self.draw_inventory()
\ No newline at end of file
+import os
+import pygame
+import controls
+from tiles import MovingTile, AnimatedTile
+from settings import tile_size, screen_width, screen_height, show_constraints, game_over_ticks, stream_level_columns
+from player import Player
+from support import load_level_layouts, compact_layout, layout_values, folder_images
+from assets import load_image, decode_images
+from preload import level_images
+from enemy import Enemy, AnimatedEnemy
+from enemy_data import enemy_list
+from camera import Camera
+from tile_grid import TileMap, ColliderGrid, tile_rect
+from renderer import TileLayer, ChunkedLayer, merge_rects
+from streaming import ChunkStreamer
+from entities import EntityStore
+from collision import sweep
+from profiler import profiler
+
+class Level:
+
+	def __init__(self, level_data, surface, status, streaming = None, layouts = None):
+
+		# Level setup
+		self.display_surface = surface
+		self.level_data = level_data
+		self.status = status
+		self.game_over_timer = 0
+
+		# Number of ticks the level has run for. Game over timing is counted
+		# in ticks rather than wall-clock time, so the level runs the same
+		# however fast it is stepped
+		self.ticks = 0
+
+		# Camera. Sprites stay at fixed world positions and the camera's world
+		# shift is used for determining if player reaches end of the screen
+		self.camera = Camera()
+		
+		# Load all layer layouts, unless they've been preloaded. Uses the
+		# compiled level file if there is one. Then decode all of the level's
+		# images at once over the decode threads, so only converting them is
+		# left to do here. Preloaded levels have already been decoded
+		if layouts is None:
+			layouts = load_level_layouts(level_data)
+			decode_images(level_images(level_data, layouts))
+		terrain_layout = layouts['terrain']
+		level_cols = len(terrain_layout[0])
+		self.world_length = level_cols * tile_size
+
+		# Long levels are streamed. Their enemies and moving platforms are kept
+		# as compact layouts and sprites are only created a chunk at a time as
+		# the camera approaches
+		if streaming is None:
+			streaming = level_cols > stream_level_columns
+
+		# Player and portal setup
+		player_layout = layouts['player']
+		self.player = pygame.sprite.GroupSingle()
+		self.portal = pygame.sprite.GroupSingle()
+		self.player_setup(player_layout)
+
+		# Static layers are tile maps rather than sprites. Fill is used for
+		# filling screen with tiles that look solid but are only used for fill,
+		# so that needless collision calls aren't used. Items (eg, corn) are
+		# cleared from their map as they're collected. Constraints set enemy
+		# and moving platform patrol ranges, and have no images
+		self.terrain_map = TileMap(terrain_layout, self.tile_images(terrain_layout, 'terrain'))
+		self.fill_map = TileMap(layouts['fill'], self.tile_images(layouts['fill'], 'fill'))
+		self.item_map = TileMap(layouts['items'], self.tile_images(layouts['items'], 'items'))
+		self.constraint_map = TileMap(layouts['constraints'])
+
+		# Terrain colliders. Terrain cells are merged into large rects for
+		# collision, and player collision only checks the ones under the player
+		self.terrain_colliders = ColliderGrid(terrain_layout)
+
+		# Enemy and moving platform positions, speeds and patrol ranges are
+		# kept in stores, which move all of them at once each tick
+		self.enemy_store = EntityStore()
+		self.platform_store = EntityStore()
+
+		# Moving platform the player is standing on, if any
+		self.standing_platform = None
+
+		# Dirty rect rendering (see render_dirty). Camera position, screen
+		# rects of everything that moves and of the score as they were last
+		# drawn, and world rects of items collected since
+		self.full_redraw = True
+		self.drawn_world_shift = 0
+		self.moved_rects = []
+		self.inventory_rects = []
+		self.drawn_corn_count = None
+		self.removed_rects = []
+
+		if streaming:
+			self.platform_sprites = pygame.sprite.Group()
+			self.enemy_sprites = pygame.sprite.Group()
+			self.streamer = ChunkStreamer(self, {name: compact_layout(layouts[name]) for name, _ in ChunkStreamer.layers})
+
+		else:
+			self.streamer = None
+
+			# Moving platform setup
+			self.platform_sprites = self.create_tile_group(layouts['platforms'], 'platforms')
+
+			# Enemy setup
+			self.enemy_sprites = self.create_tile_group(layouts['enemies'], 'enemies')
+
+			# Each enemy's and moving platform's patrol range is worked out
+			# once here from the constraints
+			self.patrol_setup(self.enemy_sprites.sprites() + self.platform_sprites.sprites())
+
+		# Terrain and fill never change, so they're pre-rendered in chunks along
+		# with their outlines. Items can be collected, so are drawn tile by
+		# tile, only where they're on screen
+		self.terrain_layer = ChunkedLayer(self.terrain_map, outline = True)
+		self.fill_layer = ChunkedLayer(self.fill_map, outline = True)
+		self.item_layer = TileLayer(self.item_map)
+		if self.streamer:
+			self.streamer.update(self.camera)
+		self.terrain_layer.prepare(self.camera)
+		self.fill_layer.prepare(self.camera)
+
+		# Corn count. This tracks the number of corn collected and the total number
+		# available. The font will be used to display the score on the screen
+		self.corn_count = 0
+		self.corn_total = self.item_map.count()
+		self.font = None
+		self.score_display = None
+		self.score_count = None
+
+
+	# Table of tile value -> image for a static layer, shared by all of its
+	# tiles. Fill uses the image specified in level_data for every tile
+	def tile_images(self, layout, type):
+		images = {}
+		for val in layout_values(layout):
+			if type == 'fill':
+				path = self.level_data['fill_image']
+			else:
+				path = f'../graphics/{type}/{val}.png'
+			images[val] = load_image(path, (tile_size, tile_size))
+		return images
+
+
+	def create_tile_group(self, layout, type):
+		return pygame.sprite.Group(self.create_tiles(layout, type))
+
+
+	# Create sprites for the tiles of a layer that moves (platforms or
+	# enemies), optionally only for columns first_col to last_col (inclusive).
+	# Cells in skip, as (col, row), are left out
+	def create_tiles(self, layout, type, first_col = 0, last_col = None, skip = ()):
+		sprites = []
+		if last_col is None:
+			last_col = len(layout[0]) - 1
+
+		for row_index, row in enumerate(layout):
+			for col_index in range(first_col, last_col + 1):
+				val = row[col_index]
+
+				# If tile value is -1, it's an empty tile (eg, sky)
+				if val != -1 and (col_index, row_index) not in skip:
+					x = col_index * tile_size
+					y = row_index * tile_size
+
+					# If tile is platform, create a moving tile.
+					if type == 'platforms':
+						image = load_image(f'../graphics/{type}/{val}.png', (tile_size, tile_size))
+						sprite = MovingTile(tile_size, tile_size, x, y, image, val % 2, self.platform_store)
+
+					# If tile is enemy, create an enemy tile. Enemies without their
+					# graphics (eg, the bee's, which aren't in the repo) are left out,
+					# as the portal is
+					elif type == 'enemies':
+
+						image_width = tile_size * enemy_list[val][1]
+						image_height = tile_size * enemy_list[val][2]
+
+						# If enemy data value is 0, load static sprite
+						if enemy_list[val][0] == 0:
+							path = f'../graphics/{type}/{val}.png'
+							if not os.path.exists(path):
+								continue
+							sprite = Enemy(image_width, image_height, x, y, enemy_list[val][3], enemy_list[val][4], path, self.enemy_store)
+
+						# If enemy data value is 1, load animated sprite
+						elif enemy_list[val][0] == 1:
+							if not folder_images(f'../graphics/{type}/{val}'):
+								continue
+							sprite = AnimatedEnemy(image_width, image_height, x, y, enemy_list[val][3], enemy_list[val][4], val, self.enemy_store)
+
+					sprites.append(sprite)
+		
+		return sprites
+
+
+	def player_setup(self, layout):
+		for row_index, row in enumerate(layout):
+			for col_index, val in enumerate(row):
+				x = col_index * tile_size
+				y = row_index * tile_size
+
+				# If tile value is 0, it's the player starting point
+				if val == 0:
+					
+					# Make player slightly smaller than tile size. This is to prevent
+					# random collision glitches. These occur when player enters a narrow
+					# tunnel and can't jump
+					sprite = Player((x, y), tile_size - int(tile_size / 6))
+					self.player.add(sprite)
+
+				# If tile value is 1, it's the level finish point (the portal).
+				# Without the portal's graphics (they aren't in the repo) the level
+				# still loads, but has no portal, so can't be finished
+				elif val == 1 and folder_images('../graphics/portal/'):
+					sprite = AnimatedTile(tile_size, tile_size, x, y, None, 'portal/')
+					self.portal.add(sprite)
+
+
+	# Set each enemy's and moving platform's patrol range from the nearest
+	# constraint tiles along its path. They reverse direction once they
+	# move past it
+	def patrol_setup(self, sprites):
+		for sprite in sprites:
+			min_bound, max_bound = self.constraint_map.patrol_bounds(sprite.rect, sprite.direction)
+			sprite.set_patrol(min_bound, max_bound)
+
+
+	# Used to scroll the camera along with the player. This is the only
+	# function that changes the camera's world shift
+	def scroll_x(self):
+		player = self.player.sprite
+		camera = self.camera
+
+		# Player's position on the screen
+		screen_rect = camera.apply(player.rect)
+
+		# If left side of player reaches left side of level, turn off player
+		# left movement. Allow pixel buffer (this is because player is
+		# updated before this function and can therefore slightly go off-screen)
+		if player.rect.x <= player.max_speed:
+			player.can_move_left = False
+
+		# If right side of player reaches right side of level, turn off player
+		# right movement
+		elif screen_rect.right >= screen_width - player.max_speed:
+			player.can_move_right = False
+
+		# Shift screen left:
+		# If center of player reaches center of screen, and player is facing left, and the world 
+		# shift is not at zero (meaning the screen is not at its leftmost point), begin shifting 
+		# world and keep player in center of screen
+		elif screen_rect.centerx < screen_width / 2 and player.direction.x < 0 and camera.total_world_shift != 0:
+			camera.scroll(player.max_speed)
+			
+		# Shift screen right:
+		# Same as above function, but this instead checks that the length of the world minus the 
+		# width of the screen is less than the total shift (meaning the screen is not at its
+		# rightmost point)
+		elif screen_rect.centerx > screen_width - (screen_width / 2) and player.direction.x > 0 and abs(camera.total_world_shift) < self.world_length - screen_width:
+			camera.scroll(-player.max_speed)
+
+		# Else, player must therefore be idle
+		else:
+			camera.scroll(0)
+
+
+	# Move the player along one axis (0 for x, 1 for y) by distance, sweeping
+	# it against moving platforms and terrain so that it stops at anything in
+	# its path, however fast either is moving. Platforms move along the same
+	# axis at the same time (along x, then along y). Terrain is swept last,
+	# over the whole distance the player moved, so a platform can't push the
+	# player into it. The player is then pushed out of any terrain it already
+	# overlapped, which the sweep ignores.
+	# Returns the side the player was stopped on (see collision.sweep) and
+	# the platform that stopped it, if any
+	def move_player(self, axis, distance):
+		player = self.player.sprite
+		store = self.platform_store
+		rect = player.rect
+		moved = rect.move(distance, 0) if axis == 0 else rect.move(0, distance)
+		path = rect.union(moved).inflate(2, 2)
+
+		# Each platform's rect before and after moving along this axis
+		platforms = []
+		for index in store.indices_in(path.inflate(tile_size * 2, tile_size * 2)):
+			start = store.last_rect(index)
+			end = store.rect(index).copy()
+			if axis == 0:
+				end.y = start.y
+			else:
+				start.x = end.x
+			platforms.append((start, end, store.sprites[index]))
+
+		position, side, platform = sweep(rect, axis, distance, platforms)
+
+		# Sweep against terrain over the distance moved after platforms, which
+		# may have pushed the player further than it meant to go
+		carried = position - (rect.x if axis == 0 else rect.y)
+		moved = rect.move(carried, 0) if axis == 0 else rect.move(0, carried)
+		path = rect.union(moved).inflate(2, 2)
+		tiles = [(tile_rect, tile_rect, None) for tile_rect in self.terrain_colliders.query(path)]
+		position, terrain_side, _ = sweep(rect, axis, carried, tiles)
+		if terrain_side:
+			side, platform = terrain_side, None
+
+		if axis == 0:
+			player.rect.x = position
+		else:
+			player.rect.y = position
+
+		terrain_side = self.push_out_of_terrain(axis)
+		if terrain_side:
+			side, platform = terrain_side, None
+		return side, platform
+
+
+	# Move the player along one axis out of any terrain it overlaps by less
+	# along that axis than along the other, out of whichever side is nearer.
+	# Returns the side it was pushed out on (as for move_player), 0 if none
+	def push_out_of_terrain(self, axis):
+		rect = self.player.sprite.rect
+		side = 0
+		for tile_rect in self.terrain_colliders.query(rect):
+			if not rect.colliderect(tile_rect):
+				continue
+
+			overlap = rect.clip(tile_rect)
+			along, across = (overlap.width, overlap.height) if axis == 0 else (overlap.height, overlap.width)
+			if along > across:
+				continue
+
+			if axis == 0:
+				if rect.centerx < tile_rect.centerx:
+					rect.right, side = tile_rect.left, 1
+				else:
+					rect.left, side = tile_rect.right, -1
+			else:
+				if rect.centery < tile_rect.centery:
+					rect.bottom, side = tile_rect.top, 1
+				else:
+					rect.top, side = tile_rect.bottom, -1
+		return side
+
+
+	# How far the platform the player is standing on moved this tick, so the
+	# player can be carried along with it
+	def platform_motion(self):
+		platform = self.standing_platform
+		if platform is None or not platform.alive():
+			return 0, 0
+
+		start = self.platform_store.last_rect(platform.index)
+		end = platform.rect
+		return end.x - start.x, end.y - start.y
+
+
+	# Move player horizontally, stopping at solid tiles and moving platforms.
+	# A player standing on a platform is carried along with it
+	def horizontal_movement_collision(self):
+		player = self.player.sprite
+		carried_x, _ = self.platform_motion()
+		side, _ = self.move_player(0, player.direction.x * player.current_speed + carried_x)
+
+		# If player runs into something, stop moving
+		if side and player.direction.x != 0:
+			player.direction.x = 0
+			if player.direction.y > 0:
+				player.on_ground = False
+
+
+	# Move player vertically under gravity, stopping at solid tiles and
+	# moving platforms
+	def vertical_movement_collision(self):
+		player = self.player.sprite
+		player.apply_gravity()
+		_, carried_y = self.platform_motion()
+		side, platform = self.move_player(1, player.direction.y + carried_y)
+
+		# If player lands on a tile or platform, set player's y movement to 0
+		# Set on_ground to True so that they can jump again. If it was a
+		# platform, the player is carried along with it from now on
+		if side > 0:
+			player.direction.y = 0
+			player.on_ground = True
+
+		# If player hits something from underneath, set player's
+		# y movement to 0
+		elif side < 0:
+			player.direction.y = 0
+
+		self.standing_platform = platform if side > 0 else None
+		player.on_platform = self.standing_platform is not None
+
+
+	# Check for collision between player and items such as corn. Collected
+	# items are cleared from the item map
+	def item_collision(self):
+		player = self.player.sprite
+		for col, row, _ in self.item_map.cells_in(player.rect):
+			self.item_map.set(col, row, -1)
+			self.removed_rects.append(tile_rect(col, row))
+			self.corn_count += 1
+
+
+	# Check for collision between player and enemies
+	def enemy_collision(self):
+		player = self.player.sprite
+
+		# If player falls off screen, it's game over
+		if player.rect.top > screen_height:
+			player.game_over = True
+			player.direction.y = 0
+
+		# If player collides with enemy, it's game over
+		else:
+			for sprite in self.enemy_store.sprites_in(player.rect):
+				player.game_over = True
+				player.speed = 0
+
+
+	# Check for collision between player and portal, if the level has one
+	def portal_collision(self):
+		player = self.player.sprite
+		portal = self.portal.sprite
+		if portal and portal.rect.colliderect(player.rect):
+			player.game_over = True
+			player.speed = 0
+
+
+	# Check for game over condition
+	def check_game_over(self):
+		player = self.player.sprite
+
+		# If game over has been activated, get current tick
+		if player.game_over and self.game_over_timer == 0:
+			self.game_over_timer = self.ticks
+
+		# After 1.5 seconds worth of ticks, set status back to overworld
+		if self.ticks > self.game_over_timer + game_over_ticks and self.game_over_timer != 0:
+			self.status = 'start_overworld'
+
+
+	# Return the score display as (image, position) pairs: the corn icon and
+	# the player's current score, in the top-left corner of the screen. The
+	# score is only rendered again when it changes
+	def inventory(self):
+		image = load_image('../graphics/items/0.png', (int(tile_size / 2), int(tile_size / 2)))
+		if self.score_count != self.corn_count:
+			if self.font is None:
+				pygame.font.init()
+				self.font = pygame.font.SysFont('Consolas', int(tile_size / 2))
+			score = str(self.corn_count) + '/' + str(self.corn_total)
+			self.score_display = self.font.render(score, True, (0, 0, 0))
+			self.score_count = self.corn_count
+		return [
+			(image, (image.get_width() / 2, image.get_height() / 2)),
+			(self.score_display, (tile_size + image.get_width() / 2, image.get_height() / 2)),
+		]
+
+
+	# Draw player's current score in top-left corner of screen
+	def draw_inventory(self, surface):
+		surface.blits(self.inventory(), False)
+
+
+	# Advance the level by one tick. Updates all sprites and checks for
+	# collisions without drawing anything, so it can also be run headless.
+	# inputs is the tick's player input bitmask (see controls.py)
+	def step(self, inputs):
+		self.ticks += 1
+
+		# Create sprites for chunks coming near the screen, and remove
+		# those far from it
+		if self.streamer:
+			with profiler.section('streaming'):
+				self.streamer.update(self.camera)
+
+		# Static tiles never move, so only the moving platforms need
+		# updating. Platforms reverse at the end of their patrol range
+		with profiler.section('platform_update'):
+			self.platform_store.step()
+
+		# Check for item collision
+		with profiler.section('item_collision'):
+			self.item_collision()
+
+		# Check for portal collision. Portal is only active once all
+		# corn is collected
+		with profiler.section('portal'):
+			self.portal.update()
+			if self.corn_count == self.corn_total:
+				self.portal_collision()
+
+		# Update player, scroll screen, check for tile collision
+		with profiler.section('player_update'):
+			self.player.update(inputs)
+		with profiler.section('scroll_x'):
+			self.scroll_x()
+		with profiler.section('horizontal_collision'):
+			self.horizontal_movement_collision()
+		with profiler.section('vertical_collision'):
+			self.vertical_movement_collision()
+
+		# Update enemies. Enemies reverse at the end of their patrol
+		# range while they move
+		with profiler.section('enemy_update'):
+			self.enemy_store.step()
+		with profiler.section('enemy_collision'):
+			self.enemy_collision()
+
+		# Check if game over has been activated
+		self.check_game_over()
+
+
+	# Draw the level at the camera's current position
+	def render(self, surface):
+
+		# Draw terrain, moving platforms and fill tiles. Draw black
+		# rectangle around each moving platform
+		with profiler.section('draw_terrain'):
+			self.terrain_layer.draw(surface, self.camera)
+		viewport = self.camera.viewport()
+		with profiler.section('draw_platforms'):
+			platforms = self.platform_store.sprites_in(viewport)
+			self.camera.blit(platforms, surface)
+			for sprite in platforms:
+				pygame.draw.rect(surface, (0, 0, 0), self.camera.apply(sprite.rect), 1)
+		with profiler.section('draw_fill'):
+			self.fill_layer.draw(surface, self.camera)
+
+		# Draw item tiles
+		with profiler.section('draw_items'):
+			self.item_layer.draw(surface, self.camera)
+
+		# Only draw portal once all corn is collected. Draw player
+		# and enemies
+		with profiler.section('draw_sprites'):
+			if self.corn_count == self.corn_total:
+				self.camera.draw(self.portal, surface)
+			self.camera.draw(self.player, surface)
+			self.camera.blit(self.enemy_store.sprites_in(viewport), surface)
+
+		# Debug view of constraint tiles
+		if show_constraints:
+			for col, row, _ in self.constraint_map.cells_in(viewport):
+				pygame.draw.rect(surface, (255, 0, 0), self.camera.apply(tile_rect(col, row)), 1)
+
+		# Draw score on screen
+		with profiler.section('draw_hud'):
+			self.draw_inventory(surface)
+
+
+	# Screen rects of everything that can change without the camera
+	# scrolling: moving platforms, enemies, the player and the portal
+	def moving_rects(self):
+		viewport = self.camera.viewport()
+		sprites = self.player.sprites()
+		if self.corn_count == self.corn_total:
+			sprites += self.portal.sprites()
+		sprites = [sprite for sprite in sprites if viewport.colliderect(sprite.rect)]
+		sprites += self.platform_store.sprites_in(viewport) + self.enemy_store.sprites_in(viewport)
+		return [self.camera.apply(sprite.rect) for sprite in sprites]
+
+
+	# Draw the level, filling the background first, but only redraw the parts
+	# of the screen that changed since the last call. Returns the changed
+	# screen rects, to be passed to pygame.display.update. If the camera has
+	# scrolled since then, every pixel moved, so the whole screen is redrawn
+	def render_dirty(self, surface):
+		background = self.level_data['background']
+		screen_rect = surface.get_rect()
+		moved_rects = self.moving_rects()
+		inventory_rects = [image.get_rect(topleft = position) for image, position in self.inventory()]
+
+		if self.full_redraw or self.camera.total_world_shift != self.drawn_world_shift:
+			surface.fill(background)
+			self.render(surface)
+			dirty_rects = [screen_rect]
+
+		else:
+			# Redraw where sprites were last frame and where they are now,
+			# where items were collected, and the score if it changed
+			rects = self.moved_rects + moved_rects + [self.camera.apply(rect) for rect in self.removed_rects]
+			if self.drawn_corn_count != self.corn_count:
+				rects += self.inventory_rects + inventory_rects
+
+			# The level is drawn once, clipped to the area covering every dirty
+			# rect. Only the dirty rects themselves are updated on the display
+			dirty_rects = merge_rects([rect.clip(screen_rect) for rect in rects if rect.colliderect(screen_rect)])
+			if dirty_rects:
+				surface.set_clip(dirty_rects[0].unionall(dirty_rects[1:]))
+				surface.fill(background)
+				self.render(surface)
+				surface.set_clip(None)
+
+		self.full_redraw = False
+		self.drawn_world_shift = self.camera.total_world_shift
+		self.moved_rects = moved_rects
+		self.inventory_rects = inventory_rects
+		self.drawn_corn_count = self.corn_count
+		self.removed_rects = []
+		return dirty_rects
+
+
+	# Main level function. Runs one tick using keyboard input, then draws
+	# the level to the display surface
+	def run(self):
+		self.step(controls.read_keyboard())
+		self.render(self.display_surface)
@@ -0,0 +1,98 @@
+import sys, mmap, struct
+from array import array
+from argparse import ArgumentParser
+from level_data import layer_names
+
+# Compiled level files pack all of a level's layers into one binary file,
+# which is memory-mapped when loaded, so there's no text to parse.
+# Layout (little-endian):
+#   Header: magic (4 bytes), format version (u16), number of layers (u16)
+#   Layer table, one entry per layer: name (16 bytes, zero padded),
+#     rows (u32), columns (u32), byte offset of the layer's data (u32)
+#   Layer data: each layer's tile values as signed 16-bit integers, row by row
+magic = b'PLVL'
+format_version = 1
+header_format = '<4sHH'
+entry_format = '<16sIII'
+header_size = struct.calcsize(header_format)
+entry_size = struct.calcsize(entry_format)
+
+
+# Write a dictionary of layer layouts (lists of rows of tile values)
+# to a compiled level file. Layers that are missing (eg, a level without
+# moving platforms) are written as empty layouts the size of the terrain,
+# so a compiled level always has every layer
+def write_compiled_level(layouts, path):
+	size_layout = layouts.get('terrain') or next(iter(layouts.values()))
+	layouts = dict(layouts)
+	for name in layer_names:
+		if name not in layouts:
+			layouts[name] = [[-1] * len(size_layout[0]) for _ in range(len(size_layout))]
+
+	table = bytearray()
+	data = bytearray()
+	data_offset = header_size + entry_size * len(layouts)
+
+	for name, layout in layouts.items():
+		rows = len(layout)
+		cols = len(layout[0]) if rows else 0
+		if any(len(row) != cols for row in layout):
+			raise ValueError(f'layer {name} has rows of different lengths')
+
+		values = array('h')
+		for row in layout:
+			values.extend(row)
+		if sys.byteorder == 'big':
+			values.byteswap()
+
+		table += struct.pack(entry_format, name.encode('ascii'), rows, cols, data_offset + len(data))
+		data += values.tobytes()
+
+	with open(path, 'wb') as file:
+		file.write(struct.pack(header_format, magic, format_version, len(layouts)))
+		file.write(table)
+		file.write(data)
+
+
+# Memory-map a compiled level file and return a dictionary of its layer
+# layouts. Each row is a view straight into the mapped file, so no tile
+# data is copied or parsed
+def load_compiled_level(path):
+	with open(path, 'rb') as file:
+		data = mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ)
+
+	file_magic, version, layer_count = struct.unpack_from(header_format, data, 0)
+	if file_magic != magic or version != format_version:
+		raise ValueError(f'{path} is not a compiled level (version {format_version})')
+
+	view = memoryview(data)
+	layouts = {}
+	for index in range(layer_count):
+		name, rows, cols, offset = struct.unpack_from(entry_format, data, header_size + entry_size * index)
+		values = view[offset:offset + rows * cols * 2].cast('h')
+
+		# Values are stored little-endian. Big-endian machines need a
+		# byte-swapped copy
+		if sys.byteorder == 'big':
+			values = array('h', values.tobytes())
+			values.byteswap()
+
+		layouts[name.rstrip(b'\0').decode('ascii')] = [values[row * cols:(row + 1) * cols] for row in range(rows)]
+
+	return layouts
+
+
+if __name__ == '__main__':
+	from level_data import build_level
+	from support import load_source_layouts
+
+	parser = ArgumentParser(description = "Compile levels' .tmx/.csv layers into a single binary file each")
+	parser.add_argument('levels', type = int, nargs = '+', help = 'level numbers to compile')
+	parser.add_argument('--root', default = '../levels', help = 'folder containing the levels')
+	args = parser.parse_args()
+
+	for value in args.levels:
+		level_data = build_level(value, args.root)
+		layouts = load_source_layouts(level_data)
+		write_compiled_level(layouts, level_data['compiled'])
+		print(f"level {value}: {len(layouts)} layers -> {level_data['compiled']}")
@@ -1,22 +1,41 @@
-
-def build_level(value):
-
-	level = {
-		'terrain': f'../levels/{value}/level_{value}_terrain.csv',
-		'platforms': f'../levels/{value}/level_{value}_platforms.csv',
-		'fill': f'../levels/{value}/level_{value}_fill.csv',
-		'player': f'../levels/{value}/level_{value}_player.csv',
-		'items': f'../levels/{value}/level_{value}_items.csv',
-		'enemies': f'../levels/{value}/level_{value}_enemies.csv',
-		'constraints': f'../levels/{value}/level_{value}_constraints.csv',
-	}
-
-	# Levels 1-5: Hilly-verse. Background: Sky blue. Fill image: grass
-	if value >= 1 and value <= 5:
-		level.update({'background': (153, 217, 234), 'fill_image': '../graphics/terrain/1.png'})
-
-	# Levels 6-10: Beachy. Background: Sky blue. Fill image: sand
-	elif value >= 6 and value <= 10:
-		level.update({'background': (153, 217, 234), 'fill_image': '../graphics/terrain/2.png'})
-
+# Names of the layers every level is made of. Each is a layer in the
+# level's Tiled map, and can also be exported as its own .csv file
+layer_names = ['terrain', 'platforms', 'fill', 'player', 'items', 'enemies', 'constraints']
+
+
+# Build dictionary of a level's layer files and settings. Levels are read
+# from root/value/ (defaults to the game's levels folder)
+def build_level(value, root = '../levels'):
+
+	level = {
+		'terrain': f'{root}/{value}/level_{value}_terrain.csv',
+		'platforms': f'{root}/{value}/level_{value}_platforms.csv',
+		'fill': f'{root}/{value}/level_{value}_fill.csv',
+		'player': f'{root}/{value}/level_{value}_player.csv',
+		'items': f'{root}/{value}/level_{value}_items.csv',
+		'enemies': f'{root}/{value}/level_{value}_enemies.csv',
+		'constraints': f'{root}/{value}/level_{value}_constraints.csv',
+
+		# Tiled map with every layer in one file. Used instead of the
+		# .csv files when present
+		'tmx': f'{root}/{value}/level_{value}.tmx',
+
+		# All layers packed into one file by level_compiler.py. Used instead
+		# of the .csv files when present
+		'compiled': f'{root}/{value}/level_{value}.bin',
+	}
+
+	# Level 0: test level, not part of a world. Background: Sky blue. Fill
+	# image: fill tile
+	if value == 0:
+		level.update({'background': (153, 217, 234), 'fill_image': '../graphics/fill/0.png'})
+
+	# Levels 1-5: Hilly-verse. Background: Sky blue. Fill image: grass
+	elif value >= 1 and value <= 5:
+		level.update({'background': (153, 217, 234), 'fill_image': '../graphics/terrain/1.png'})
+
+	# Levels 6-10: Beachy. Background: Sky blue. Fill image: sand
+	elif value >= 6 and value <= 10:
+		level.update({'background': (153, 217, 234), 'fill_image': '../graphics/terrain/2.png'})
+
 	return level
\ No newline at end of file
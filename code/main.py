@@ -1,55 +1,246 @@
-import pygame, sys
-from settings import *
-from overworld import Overworld
-from level import Level
-from level_data import *
-
-screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
-clock = pygame.time.Clock()
-
-# Set starting status to start overworld. Current level is none
-status = 'start_overworld'
-current_level = None
-overworld = Overworld(screen, status)
-
-# Create level object with default settings
-level = Level(build_level(1), screen, status)
-
-while True:
-	for event in pygame.event.get():
-		if event.type == pygame.QUIT:
-			pygame.quit()
-			sys.exit()
-
-	# Check status in loop
-	# 'Start overworld' creates the overworld object
-	if status == 'start_overworld':
-		overworld = Overworld(screen, status)
-		status = 'overworld'
-
-	# 'Overworld' runs the overworld loop
-	elif status == 'overworld':
-		screen.fill((0,0,0))
-		overworld.run()
-
-		# While in overworld, if the status changes, change it here too
-		if overworld.status == 'start_level':
-			status = 'start_level'
-			current_level = build_level(overworld.level_counter + 1)
-
-	# 'Start level' creates the desired level
-	elif status == 'start_level':
-		level = Level(current_level, screen, status)
-		status = 'level'
-	
-	# 'Level' will run the level loop
-	elif status == 'level':
-		screen.fill(current_level['background'])
-		level.run()
-
-		# While in level, if the status changes, change it here too
-		if level.status == 'start_overworld':
-			status = 'start_overworld'
-
-	pygame.display.update()
-	clock.tick(60)
\ No newline at end of file
+import sys, os, time
+from argparse import ArgumentParser
+
+# Startup is staged so that a window is shown as soon as possible. Only
+# pygame's display and the settings are set up before the first frame.
+# Everything else is imported and initialised after it, and images are
+# loaded in the background
+startup_time = time.perf_counter()
+startup_stages = []
+
+
+# Record how long a stage of startup took, since the previous stage
+def stage(name):
+	global startup_time
+	now = time.perf_counter()
+	startup_stages.append((name, (now - startup_time) * 1000))
+	startup_time = now
+
+
+# Wrap a function run in the background so that it's timed as a stage
+def background_stage(name, function):
+	def run():
+		start = time.perf_counter()
+		function()
+		startup_stages.append((name + ' (background)', (time.perf_counter() - start) * 1000))
+	return run
+
+
+# Print each stage of startup, and the total time to the window's first
+# frame and to the overworld's. Background stages run alongside the others,
+# so they aren't part of either total
+def print_startup_report():
+	total = 0
+	for name, milliseconds in startup_stages:
+		if not name.endswith('(background)'):
+			total += milliseconds
+		print(f'{name:<36}{milliseconds:>10.1f}ms')
+		if name == 'open window, first frame':
+			print(f'{"= time to first frame":<36}{total:>10.1f}ms')
+	print(f'{"= time to overworld":<36}{total:>10.1f}ms')
+
+
+parser = ArgumentParser(description = 'Run the game')
+parser.add_argument('--startup-report', action = 'store_true', help = 'print how long each stage of startup took')
+args = parser.parse_args()
+
+import pygame
+stage('import pygame')
+from settings import *
+stage('import settings, init display')
+
+# Show the window straight away, before anything else is loaded
+screen = pygame.display.set_mode((screen_width, screen_height), pygame.RESIZABLE)
+screen.fill((0,0,0))
+pygame.display.update()
+stage('open window, first frame')
+
+# Initialise the rest of pygame (fonts, sound, etc), then import the game
+pygame.init()
+stage('init pygame modules')
+import controls
+from overworld import Overworld
+from level import Level
+from level_data import *
+from preload import LevelPreloader
+from replay import Recorder
+from atlas import load_cached_atlas, save_cached_atlas
+from profiler import profiler
+stage('import game modules')
+
+clock = pygame.time.Clock()
+profiler.enabled = profile
+
+# Set starting status to start overworld. The overworld is created on the
+# first tick. Current level is none
+status = 'start_overworld'
+current_level = None
+overworld = None
+
+# Levels are loaded in the background while the overworld is shown.
+# No level is created until the player chooses one
+preloader = LevelPreloader()
+level = None
+
+# Images are loaded from the atlas for this tile size, if one has been built,
+# in the background before any level is preloaded. Any others are added to
+# it on exit
+atlas_future = preloader.submit(background_stage('load image atlas', load_cached_atlas))
+startup_reported = not args.startup_report
+overworld_drawn = False
+
+# Records the current level's inputs if record_replays is set
+recorder = None
+
+
+# Wait for the atlas to finish loading, raising any error it hit. Nothing
+# may load images, or write the atlas, until it has, or they'd be decoded
+# again or overwrite it
+def wait_for_atlas():
+	atlas_future.result()
+
+
+# Save the current level's recorded inputs to the replays folder
+def save_recording():
+	os.makedirs(replay_folder, exist_ok = True)
+	path = os.path.join(replay_folder, f'level_{recorder.level_id}_{time.strftime("%Y%m%d_%H%M%S")}.rpl')
+	recorder.save(path)
+
+# The simulation advances in fixed ticks of tick_time, however often frames
+# are drawn, so the game runs at the same speed on any machine or display
+tick_time = 1 / tick_rate
+accumulator = 0
+previous_time = time.perf_counter()
+
+
+# Advance the game by one tick
+def tick():
+	global status, overworld, current_level, level, recorder, accumulator, previous_time, overworld_drawn
+
+	# Check status in loop
+	# 'Start overworld' creates the overworld object
+	if status == 'start_overworld':
+		wait_for_atlas()
+		overworld = Overworld(screen, status)
+		status = 'overworld'
+
+	# 'Overworld' runs the overworld loop
+	elif status == 'overworld':
+		screen.fill((0,0,0))
+		overworld.run()
+		overworld_drawn = True
+
+		# Preload the currently selected level. If the selection changes,
+		# the new level starts preloading instead
+		preloader.request(overworld.level_counter + 1)
+
+		# While in overworld, if the status changes, change it here too
+		if overworld.status == 'start_level':
+			status = 'start_level'
+
+	# 'Start level' creates the desired level from the preloaded data. The
+	# time taken to create it isn't made up for with extra ticks
+	elif status == 'start_level':
+		current_level, layouts = preloader.get(overworld.level_counter + 1)
+		wait_for_atlas()
+		level = Level(current_level, screen, status, layouts = layouts)
+		if record_replays:
+			recorder = Recorder(overworld.level_counter + 1, tile_size)
+		status = 'level'
+		accumulator = 0
+		previous_time = time.perf_counter()
+
+	# 'Level' will run the level loop
+	elif status == 'level':
+		inputs = controls.read_keyboard()
+		level.step(inputs)
+		if recorder:
+			recorder.record(inputs)
+
+		# While in level, if the status changes, change it here too. The
+		# level's recording ends with it
+		if level.status == 'start_overworld':
+			status = 'start_overworld'
+			if recorder:
+				save_recording()
+				recorder = None
+
+
+while True:
+	frame_start = time.perf_counter()
+
+	for event in pygame.event.get():
+		if event.type == pygame.QUIT:
+			if profiler.enabled:
+				profiler.export_trace('profile_trace.json')
+			if recorder:
+				save_recording()
+			wait_for_atlas()
+			save_cached_atlas()
+			pygame.quit()
+			sys.exit()
+
+		# F3 shows/hides the profiler overlay
+		if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+			profiler.show_overlay = not profiler.show_overlay
+			if level:
+				level.full_redraw = True
+
+		# Anything that invalidates the window's contents means the level
+		# has to be redrawn in full
+		if event.type in (pygame.VIDEORESIZE, pygame.WINDOWEXPOSED) and level:
+			level.full_redraw = True
+
+	# Run every tick that's due since the last frame. If drawing can't keep
+	# up, several ticks run before the next frame is drawn, skipping the
+	# frames in between. Past max_ticks_per_frame the time is dropped, and
+	# the game slows down rather than falling further and further behind.
+	# A change of status ends the frame's ticks, so a level that has just
+	# started (which restarts the timing) doesn't run ticks that were due
+	# before it existed
+	accumulator += frame_start - previous_time
+	previous_time = frame_start
+	ticks = 0
+	while accumulator >= tick_time and ticks < max_ticks_per_frame:
+		accumulator -= tick_time
+		ticks += 1
+		previous_status = status
+		tick()
+		if status != previous_status:
+			break
+	if ticks == max_ticks_per_frame:
+		accumulator %= tick_time
+
+	# Only draw a frame if the game has moved on since the last one. Nothing
+	# is interpolated between ticks, so a frame with no tick since the last
+	# would be drawn the same
+	if ticks:
+
+		# Parts of the screen to update. None updates all of it
+		update_rects = None
+
+		# In dirty rect mode, the level only redraws the parts of the screen
+		# that changed, and only those are updated. The profiler overlay is
+		# drawn on top every frame, so it needs the whole screen redrawn
+		if status == 'level':
+			if dirty_rects:
+				level.full_redraw = level.full_redraw or profiler.show_overlay
+				update_rects = level.render_dirty(screen)
+			else:
+				screen.fill(current_level['background'])
+				level.render(screen)
+
+		profiler.draw_overlay(screen)
+		with profiler.section('display_update'):
+			pygame.display.update(update_rects)
+
+		if profiler.enabled:
+			profiler.record('frame', frame_start, time.perf_counter())
+
+		# Startup ends once the overworld has been shown
+		if overworld_drawn and not startup_reported:
+			stage('first overworld frame')
+			print_startup_report()
+			startup_reported = True
+
+	clock.tick(max_fps)
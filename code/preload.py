@@ -0,0 +1,97 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from settings import tile_size
+from level_data import build_level
+from support import load_level_layouts, folder_images, layout_values
+from assets import decode_images
+from enemy_data import enemy_list
+
+
+# Add an image and its horizontally flipped copy to a set of images
+def add_flipped_pair(images, path, size):
+	images.add((path, size, False))
+	images.add((path, size, True))
+
+
+# List every image a level needs, as (path, size, flip), working out from
+# its layouts which tiles and enemies are used. Sizes must match the ones
+# used by Level, Player, Enemy and AnimatedTile. Images whose file doesn't
+# exist (eg, the player's dead image) are left out, so they only fail to
+# load when they're actually used, as they would without preloading
+def level_images(level_data, layouts):
+	tile = (tile_size, tile_size)
+	images = set()
+
+	# Terrain, items and moving platforms
+	for type in ['terrain', 'items', 'platforms']:
+		for val in layout_values(layouts[type]):
+			images.add((f'../graphics/{type}/{val}.png', tile, False))
+
+	# Fill uses a single image set by the level data
+	if layout_values(layouts['fill']):
+		images.add((level_data['fill_image'], tile, False))
+
+	# Enemies face both ways, so need flipped images too
+	for val in layout_values(layouts['enemies']):
+		size = (tile_size * enemy_list[val][1], tile_size * enemy_list[val][2])
+		if enemy_list[val][0] == 0:
+			add_flipped_pair(images, f'../graphics/enemies/{val}.png', size)
+		else:
+			for path in folder_images(f'../graphics/enemies/{val}'):
+				add_flipped_pair(images, path, size)
+
+	# Player, portal and score display
+	player_size = (tile_size - int(tile_size / 6), tile_size - int(tile_size / 6))
+	for animation in ['idle', 'run']:
+		for path in folder_images('../graphics/player/' + animation):
+			add_flipped_pair(images, path, player_size)
+	images.add(('../graphics/player/dead.png', player_size, False))
+	for path in folder_images('../graphics/portal/'):
+		images.add((path, tile, False))
+	images.add(('../graphics/items/0.png', (int(tile_size / 2), int(tile_size / 2)), False))
+
+	return {key for key in images if os.path.exists(key[0])}
+
+
+# Load a level's data and decode all of its images, spread over the decode
+# threads. Runs on the worker thread. Returns the level data and its layer
+# layouts
+def preload_level(level_id):
+	level_data = build_level(level_id)
+	layouts = load_level_layouts(level_data)
+	decode_images(level_images(level_data, layouts))
+	return level_data, layouts
+
+
+class LevelPreloader:
+
+	# Loads a level's data and decodes its images in the background, so
+	# that creating the Level on the main thread only has to convert the
+	# decoded images for the display
+	def __init__(self):
+		self.executor = ThreadPoolExecutor(max_workers = 1)
+		self.level_id = None
+		self.future = None
+
+
+	# Start preloading a level in the background. Does nothing if the level
+	# is already being preloaded, so can be called every frame
+	def request(self, level_id):
+		if level_id != self.level_id:
+			if self.future:
+				self.future.cancel()
+			self.level_id = level_id
+			self.future = self.executor.submit(preload_level, level_id)
+
+
+	# Run another task on the worker thread. Levels requested after it are
+	# preloaded once it's finished
+	def submit(self, function):
+		return self.executor.submit(function)
+
+
+	# Return (level data, layouts) for a level, waiting for it to finish
+	# preloading if it hasn't yet
+	def get(self, level_id):
+		self.request(level_id)
+		return self.future.result()
@@ -0,0 +1,149 @@
+import json, time
+from collections import deque
+import pygame
+
+
+class Section:
+
+	# Times one named section of code, used with a with statement
+	def __init__(self, profiler, name):
+		self.profiler = profiler
+		self.name = name
+
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+
+
+	def __exit__(self, *exception):
+		self.profiler.record(self.name, self.start, time.perf_counter())
+
+
+class NullSection:
+
+	# Stands in for Section while profiling is disabled, so that timed code
+	# only pays for one method call
+	def __enter__(self):
+		pass
+
+
+	def __exit__(self, *exception):
+		pass
+
+
+null_section = NullSection()
+
+
+class Profiler:
+
+	# Opt-in frame profiler. Code is timed by wrapping it in
+	# 'with profiler.section(name):'. Keeps the last window samples of each
+	# section for rolling percentiles, which can be drawn as an overlay, and
+	# the last max_events timings for exporting as a Chrome trace
+	def __init__(self, enabled = False, window = 300, max_events = 200000):
+		self.enabled = enabled
+		self.window = window
+		self.show_overlay = False
+		self.events = deque(maxlen = max_events)
+		self.font = None
+		self.reset()
+
+
+	# Forget all recorded timings
+	def reset(self):
+		self.samples = {}
+		self.totals = {}
+		self.counts = {}
+		self.events.clear()
+
+
+	def section(self, name):
+		if self.enabled:
+			return Section(self, name)
+		return null_section
+
+
+	# Record one timing of a section, with start and end in seconds
+	def record(self, name, start, end):
+		duration = end - start
+		if name not in self.samples:
+			self.samples[name] = deque(maxlen = self.window)
+			self.totals[name] = 0
+			self.counts[name] = 0
+
+		self.samples[name].append(duration)
+		self.totals[name] += duration
+		self.counts[name] += 1
+		self.events.append((name, start, duration))
+
+
+	# Return p50, p95 and p99 of a section's recent timings, in milliseconds
+	def percentiles(self, name):
+		samples = sorted(self.samples[name])
+		last = len(samples) - 1
+		return tuple(samples[round(last * percent)] * 1000 for percent in (0.5, 0.95, 0.99))
+
+
+	# Return summary of every section: percentiles, mean and number of calls
+	def summary(self):
+		summary = {}
+		for name in self.samples:
+			p50, p95, p99 = self.percentiles(name)
+			summary[name] = {
+				'p50_ms': p50,
+				'p95_ms': p95,
+				'p99_ms': p99,
+				'mean_ms': self.totals[name] / self.counts[name] * 1000,
+				'calls': self.counts[name],
+			}
+		return summary
+
+
+	# Draw each section's percentiles in the top-right corner of the screen
+	def draw_overlay(self, surface):
+		if not self.show_overlay or not self.samples:
+			return
+
+		if self.font is None:
+			pygame.font.init()
+			self.font = pygame.font.SysFont('Consolas', 14)
+
+		lines = [f'{"section":<22}{"p50":>8}{"p95":>8}{"p99":>8}']
+		for name in self.samples:
+			p50, p95, p99 = self.percentiles(name)
+			lines.append(f'{name:<22}{p50:>8.3f}{p95:>8.3f}{p99:>8.3f}')
+
+		line_height = self.font.get_linesize()
+		width = max(self.font.size(line)[0] for line in lines) + 10
+		background = pygame.Surface((width, line_height * len(lines) + 10), pygame.SRCALPHA)
+		background.fill((0, 0, 0, 180))
+		x = surface.get_width() - width
+		surface.blit(background, (x, 0))
+
+		for index, line in enumerate(lines):
+			text = self.font.render(line, True, (255, 255, 255))
+			surface.blit(text, (x + 5, 5 + index * line_height))
+
+
+	# Write recorded timings to a Chrome trace file (open it in
+	# chrome://tracing or Perfetto), with the percentile summary included
+	def export_trace(self, path):
+		trace_events = [{
+			'name': name,
+			'ph': 'X',
+			'ts': start * 1000000,
+			'dur': duration * 1000000,
+			'pid': 0,
+			'tid': 0,
+		} for name, start, duration in self.events]
+
+		with open(path, 'w') as file:
+			json.dump({
+				'traceEvents': trace_events,
+				'displayTimeUnit': 'ms',
+				'otherData': {'summary': self.summary()},
+			}, file)
+
+
+# Game-wide profiler. Enabled by the profile setting
+profiler = Profiler()
@@ -0,0 +1,158 @@
+import pygame
+from settings import tile_size, screen_width
+from tile_grid import tile_rect
+from assets import colorkeys, unused_colorkey
+
+class TileLayer:
+
+	# Draws a TileMap. Only the cells that intersect the screen are looked
+	# at, and their images are submitted as one batch, so drawing cost
+	# doesn't depend on the length of the level
+	def __init__(self, tile_map, outline = False):
+		self.tile_map = tile_map
+		self.outline = outline
+
+
+	# Draw the visible tiles. Cleared cells (eg, collected items) are empty,
+	# so are skipped. If outline is set, draw black rectangle around each tile
+	def draw(self, surface, camera):
+		images = self.tile_map.images
+		blit_list = []
+		for col, row, val in self.tile_map.cells_in(camera.viewport()):
+			blit_list.append((images[val], camera.apply(tile_rect(col, row))))
+
+		surface.blits(blit_list, False)
+
+		if self.outline:
+			for _, rect in blit_list:
+				pygame.draw.rect(surface, (0, 0, 0), rect, 1)
+
+
+class ChunkedLayer(TileLayer):
+
+	# Static layer pre-rendered into surfaces chunk_columns tiles wide,
+	# outlines included. Drawing a frame then only blits the two or three
+	# chunks on screen instead of every tile. Chunks within bake_margin
+	# chunks of the screen are baked before they scroll into view, and
+	# dropped again once they're a chunk further off it than that, so memory
+	# doesn't grow with the length of the level and scrolling back and
+	# forth doesn't bake the same chunks again
+	chunk_columns = 16
+	bake_margin = 1
+
+	def __init__(self, tile_map, outline = False):
+		super().__init__(tile_map, outline)
+		self.chunk_width = self.chunk_columns * tile_size
+		self.chunk_count = (tile_map.cols + self.chunk_columns - 1) // self.chunk_columns
+		self.chunks = {}
+		self.colorkey = chunk_colorkey(tile_map.images.values())
+
+
+	# Render one chunk's tiles to a surface. The surface only covers the rows
+	# the chunk's tiles are in, so empty sky isn't blitted every frame. The
+	# sky between tiles is filled with the layer's colorkey, so the chunk is
+	# blitted like a binary alpha image (see convert_image) without having
+	# to look at its pixels. Layers with partly transparent tiles have no
+	# colorkey, so their chunks keep per-pixel alpha.
+	# Returns the surface and its top y position, or None if chunk is empty
+	def bake(self, index):
+		tile_map = self.tile_map
+		chunk_rect = pygame.Rect(index * self.chunk_width, 0, self.chunk_width, tile_map.rows * tile_size)
+		cells = tile_map.cells_in(chunk_rect)
+
+		if not cells:
+			return None
+
+		top = cells[0][1] * tile_size
+		bottom = (cells[-1][1] + 1) * tile_size
+		# Keyed chunks are made in the display's format, rather than converted
+		# to it, which would copy every pixel
+		if self.colorkey is None:
+			surface = pygame.Surface((self.chunk_width, bottom - top), pygame.SRCALPHA)
+		else:
+			surface = pygame.Surface((self.chunk_width, bottom - top), 0, pygame.display.get_surface())
+			surface.fill(self.colorkey)
+
+		for col, row, val in cells:
+			rect = tile_rect(col, row).move(-chunk_rect.x, -top)
+			surface.blit(tile_map.images[val], rect)
+			if self.outline:
+				pygame.draw.rect(surface, (0, 0, 0), rect, 1)
+
+		if self.colorkey is None:
+			return surface.convert_alpha(), top
+		surface.set_colorkey(self.colorkey, pygame.RLEACCEL)
+		return surface, top
+
+
+	# Return range of chunks visible on screen for the camera's position
+	def visible_chunks(self, camera):
+		first_chunk = max(-camera.total_world_shift // self.chunk_width, 0)
+		last_chunk = min((screen_width - camera.total_world_shift - 1) // self.chunk_width, self.chunk_count - 1)
+		return range(first_chunk, last_chunk + 1)
+
+
+	# Bake the chunks visible for the camera's position, and those within
+	# bake_margin chunks of the screen. At most max_ahead of the ones off
+	# screen are baked per call, so the cost is spread over frames. Called
+	# with no limit when the level loads, so the first frames don't have to
+	def prepare(self, camera, max_ahead = None):
+		visible = self.visible_chunks(camera)
+		for index in visible:
+			if index not in self.chunks:
+				self.chunks[index] = self.bake(index)
+
+		baked = 0
+		for index in range(max(visible.start - self.bake_margin, 0), min(visible.stop + self.bake_margin, self.chunk_count)):
+			if index not in self.chunks:
+				if max_ahead is not None and baked == max_ahead:
+					break
+				self.chunks[index] = self.bake(index)
+				baked += 1
+
+
+	def draw(self, surface, camera):
+		visible = self.visible_chunks(camera)
+		self.prepare(camera, max_ahead = 1)
+
+		offset = camera.total_world_shift
+		blit_list = []
+		for index in visible:
+			chunk = self.chunks[index]
+			if chunk is not None:
+				chunk_surface, top = chunk
+				blit_list.append((chunk_surface, (index * self.chunk_width + offset, top)))
+
+		surface.blits(blit_list, False)
+
+		# Drop chunks that are more than bake_margin + 1 chunks off screen
+		keep = self.bake_margin + 1
+		for index in list(self.chunks):
+			if index < visible.start - keep or index >= visible.stop + keep:
+				del self.chunks[index]
+
+
+# Colorkey for the chunks of a layer of images: the first candidate not
+# used by any visible pixel of any of them. None if any image has per-pixel
+# alpha, or every candidate is used. The images are already converted (see
+# convert_image), so only ever have per-pixel alpha if they need it
+def chunk_colorkey(images):
+	candidates = colorkeys
+	for image in images:
+		if image.get_flags() & pygame.SRCALPHA:
+			return None
+		candidates = [colorkey for colorkey in candidates if unused_colorkey(image, [colorkey])]
+	return candidates[0] if candidates else None
+
+
+# Merge overlapping rects, so each part of the screen is only redrawn once.
+# Used to combine the dirty rects of a frame
+def merge_rects(rects):
+	merged = []
+	for rect in rects:
+		index = rect.collidelist(merged)
+		while index != -1:
+			rect = rect.union(merged.pop(index))
+			index = rect.collidelist(merged)
+		merged.append(rect)
+	return merged
@@ -0,0 +1,142 @@
+import os, sys, time, struct, zlib
+from argparse import ArgumentParser
+
+# Replay files hold the input bitmask of every tick of one run of a level,
+# so the run can be reproduced exactly. Speeds, gravity and the level's
+# geometry all scale with the tile size, so a run only reproduces at the
+# tile size it was recorded at. Layout (little-endian):
+#   Header: magic (4 bytes), format version (u16), level number (u16),
+#     tile size (u16), number of ticks (u32)
+#   Inputs: one byte per tick, zlib compressed
+magic = b'PRPL'
+format_version = 2
+header_format = '<4sHHHI'
+header_size = struct.calcsize(header_format)
+
+
+class Recorder:
+
+	# Records the input bitmask of each tick a level is stepped
+	def __init__(self, level_id, tile_size):
+		self.level_id = level_id
+		self.tile_size = tile_size
+		self.inputs = bytearray()
+
+
+	def record(self, inputs):
+		self.inputs.append(inputs)
+
+
+	def save(self, path):
+		save_replay(path, self.level_id, self.tile_size, self.inputs)
+
+
+def save_replay(path, level_id, tile_size, inputs):
+	with open(path, 'wb') as file:
+		file.write(struct.pack(header_format, magic, format_version, level_id, tile_size, len(inputs)))
+		file.write(zlib.compress(bytes(inputs), 9))
+
+
+# Unpack a replay's header from the start of its data. Returns the level
+# number, the tile size it was recorded at and the number of ticks
+def unpack_header(path, data):
+	if len(data) < header_size:
+		raise ValueError(f'{path} is not a replay (version {format_version})')
+
+	file_magic, version, level_id, tile_size, ticks = struct.unpack_from(header_format, data, 0)
+	if file_magic != magic or version != format_version:
+		raise ValueError(f'{path} is not a replay (version {format_version})')
+	return level_id, tile_size, ticks
+
+
+# Read only a replay file's header. Returns the level number and the tile
+# size it was recorded at
+def read_replay_header(path):
+	with open(path, 'rb') as file:
+		level_id, tile_size, ticks = unpack_header(path, file.read(header_size))
+	return level_id, tile_size
+
+
+# Load a replay file. Returns the level number, the tile size it was
+# recorded at and the input bitmask of each tick, as bytes
+def load_replay(path):
+	with open(path, 'rb') as file:
+		data = file.read()
+
+	level_id, tile_size, ticks = unpack_header(path, data)
+	inputs = zlib.decompress(data[header_size:])
+	if len(inputs) != ticks:
+		raise ValueError(f'{path} is truncated: {len(inputs)} of {ticks} ticks')
+	return level_id, tile_size, inputs
+
+
+# Raise an error if a replay was recorded at a different tile size to the
+# one the game is running at, as it wouldn't play back the same
+def check_tile_size(path, tile_size):
+	from settings import tile_size as current_tile_size
+	if tile_size != current_tile_size:
+		raise ValueError(f'{path} was recorded at tile size {tile_size}, not {current_tile_size}')
+
+
+# Play a replay in a window at normal speed, drawing every tick. Returns
+# the number of ticks run per second
+def watch_replay(level, inputs):
+	import pygame
+	from settings import tick_rate
+
+	clock = pygame.time.Clock()
+	start = time.perf_counter()
+
+	while level.ticks < len(inputs) and level.status != 'start_overworld':
+		for event in pygame.event.get():
+			if event.type == pygame.QUIT:
+				return level.ticks / (time.perf_counter() - start)
+
+		level.step(inputs[level.ticks])
+		level.display_surface.fill(level.level_data['background'])
+		level.render(level.display_surface)
+		pygame.display.update()
+		clock.tick(tick_rate)
+
+	return level.ticks / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description = 'Play back a recorded run of a level')
+	parser.add_argument('replay', help = 'replay file to play')
+	parser.add_argument('--watch', action = 'store_true', help = 'play in a window at normal speed, rather than headless as fast as possible')
+	parser.add_argument('--render', action = 'store_true', help = 'when headless, also draw every tick to an offscreen surface')
+	args = parser.parse_args()
+
+	level_id, tile_size, inputs = load_replay(args.replay)
+
+	# Play back at the tile size the replay was recorded at, rather than the
+	# one this screen would give. Like headless runs' video driver, it has
+	# to be set before pygame is initialised in settings.py
+	os.environ['TILE_SIZE'] = str(tile_size)
+
+	# Headless runs use SDL's dummy video driver, which has to be chosen
+	# before pygame is imported, so no window opens
+	if args.watch:
+		import pygame
+		from settings import screen_width, screen_height
+		from level import Level
+		from level_data import build_level
+
+		screen = pygame.display.set_mode((screen_width, screen_height))
+		level = Level(build_level(level_id), screen, 'level')
+		ticks_per_second = watch_replay(level, inputs)
+
+	else:
+		from headless import create_headless_level, run_headless
+		import pygame
+		from level_data import build_level
+
+		level = create_headless_level(build_level(level_id))
+		ticks_per_second = run_headless(level, len(inputs), lambda tick: inputs[tick], args.render)
+
+	player = level.player.sprite
+	print(f'level {level_id}: {level.ticks} of {len(inputs)} ticks at {ticks_per_second:.0f} ticks/s')
+	print(f'status: {level.status}, game over: {player.game_over}, corn: {level.corn_count}/{level.corn_total}, player: {player.rect.topleft}')
+	pygame.quit()
+	sys.exit()
@@ -1,21 +1,73 @@
-import pygame, sys
-
-# Pygame setup
-pygame.init()
-
-# Set number of vertical tiles in game
-vertical_tile_number = 14
-
-# Retrieve window height from system
-window_height = pygame.display.Info().current_h
-
-# Set tile size to match window height. Allow a buffer of 2 tiles for window
-tile_size = int(window_height / (vertical_tile_number + 2))
-screen_height = tile_size * vertical_tile_number
-
-# Set screen width to be double the height
-screen_width = screen_height * 2
-
-# Set screen ratio. This will used to scale all elements in game depending on
-# the size of user's screen
-screen_ratio = tile_size / 64
+import pygame, sys, os
+
+# Pygame setup. Only the display is needed to work out the tile size. The
+# rest of pygame is initialised once the game's window is showing
+pygame.display.init()
+
+# Set number of vertical tiles in game
+vertical_tile_number = 14
+
+# Retrieve window height from system
+window_height = pygame.display.Info().current_h
+
+# Set tile size to match window height. Allow a buffer of 2 tiles for window.
+# The TILE_SIZE environment variable overrides it, for playing back a replay
+# at the tile size it was recorded at
+tile_size = int(os.environ.get('TILE_SIZE', 0)) or int(window_height / (vertical_tile_number + 2))
+screen_height = tile_size * vertical_tile_number
+
+# Set screen width to be double the height
+screen_width = screen_height * 2
+
+# Set screen ratio. This will used to scale all elements in game depending on
+# the size of user's screen
+screen_ratio = tile_size / 64
+
+
+# Debug view. Set to True to outline the constraint tiles that set enemy
+# and moving platform patrol ranges
+show_constraints = False
+
+# Simulation ticks per second. The level advances one tick per step()
+tick_rate = 60
+
+# Time between game over and returning to the overworld, in ticks
+game_over_ticks = int(1.5 * tick_rate)
+
+# Levels wider than this many columns are streamed: sprites are created
+# in chunks as the camera approaches, rather than all when the level loads
+stream_level_columns = 256
+
+# Frame profiler. When True, each part of the frame is timed. F3 shows the
+# timings on screen, and they are written to profile_trace.json on exit
+profile = False
+
+# Dirty rect rendering. When True, levels only redraw and update the parts
+# of the screen that changed each frame, unless the camera is scrolling
+dirty_rects = False
+
+
+# Input recording. When True, the inputs of every level played are saved to
+# the replays folder, to be played back with replay.py
+record_replays = False
+replay_folder = '../replays'
+
+
+# Folder for files built from the game's assets, such as the image atlas
+# for each tile size (see atlas.py)
+asset_cache_folder = '../cache'
+
+
+# Number of threads decoding and scaling a level's images while it loads.
+# None uses one per CPU core
+decode_threads = None
+
+
+# Animation speed of animated tiles and enemies, in frames per second
+animation_fps = 9
+
+# The main loop runs up to max_fps times a second, running each tick that's
+# due and drawing a frame if any did. When drawing is too slow, up to
+# max_ticks_per_frame ticks run between frames so the game keeps its speed
+max_fps = 240
+max_ticks_per_frame = 5
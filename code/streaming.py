@@ -0,0 +1,97 @@
+from settings import tile_size, screen_width
+from renderer import ChunkedLayer
+
+class ChunkStreamer:
+
+	# Creates a level's enemy and moving platform sprites one chunk of
+	# columns at a time as the camera approaches, and removes them again
+	# once the camera has moved well away. Their layers are kept as compact
+	# layouts, so memory stays flat however long the level is. Static layers
+	# are tile maps, which are already compact, so aren't streamed.
+	# Chunks are the same width as the pre-rendered chunks of ChunkedLayer
+	chunk_columns = ChunkedLayer.chunk_columns
+
+	# Each streamed layer: (layout name, sprite group attribute)
+	layers = [
+		('platforms', 'platform_sprites'),
+		('enemies', 'enemy_sprites'),
+	]
+
+	def __init__(self, level, layouts):
+		self.level = level
+		self.layouts = layouts
+		self.cols = len(layouts['enemies'][0])
+		self.chunk_count = (self.cols + self.chunk_columns - 1) // self.chunk_columns
+		self.chunk_width = self.chunk_columns * tile_size
+
+		# Indices of the loaded chunks
+		self.loaded = set()
+
+		# Streamed sprites that exist, by (layout name, col, row) of the cell
+		# they were placed at. A sprite belongs to no chunk in particular, as
+		# it can patrol across several
+		self.sprites = {}
+
+
+	# Load chunks on screen, plus one either side, so they're ready before
+	# they scroll into view. Unload chunks more than two chunks off screen
+	def update(self, camera):
+		first_chunk = max(-camera.total_world_shift // self.chunk_width, 0)
+		last_chunk = min((screen_width - camera.total_world_shift - 1) // self.chunk_width, self.chunk_count - 1)
+
+		for index in range(max(first_chunk - 1, 0), min(last_chunk + 1, self.chunk_count - 1) + 1):
+			if index not in self.loaded:
+				self.load(index)
+
+		unloaded = [index for index in self.loaded if index < first_chunk - 2 or index > last_chunk + 2]
+		if unloaded:
+			self.loaded.difference_update(unloaded)
+			self.remove_out_of_range()
+
+
+	def chunk_columns_range(self, index):
+		first_col = index * self.chunk_columns
+		return first_col, min(first_col + self.chunk_columns, self.cols) - 1
+
+
+	# Create sprites for every streamed layer in a chunk and add them to the
+	# level. Sprites placed in the chunk that still exist (because they
+	# patrol into a chunk that stayed loaded) aren't created again
+	def load(self, index):
+		level = self.level
+		first_col, last_col = self.chunk_columns_range(index)
+
+		for name, group_name in self.layers:
+			existing = {(col, row) for layer, col, row in self.sprites if layer == name}
+			sprites = level.create_tiles(self.layouts[name], name, first_col, last_col, existing)
+			level.patrol_setup(sprites)
+			getattr(level, group_name).add(sprites)
+			for sprite in sprites:
+				rect = sprite.rect
+				self.sprites[(name, rect.x // tile_size, rect.y // tile_size)] = sprite
+
+		self.loaded.add(index)
+
+
+	# Range of chunks (first, last) a sprite can reach while patrolling
+	def patrol_chunks(self, sprite):
+		rect = sprite.rect
+		if sprite.direction == 0:
+			min_bound, max_bound = sprite.patrol_bounds()
+			left = max(min_bound, 0)
+			right = min(max_bound, self.cols * tile_size)
+		else:
+			left, right = rect.left, rect.right
+		return int(left) // self.chunk_width, (int(right) - 1) // self.chunk_width
+
+
+	# Remove enemies and platforms whose patrol range no longer reaches any
+	# loaded chunk. One that has patrolled from an unloaded chunk into a
+	# loaded one is kept. They start again from where they were placed when
+	# their chunk is loaded again
+	def remove_out_of_range(self):
+		for key, sprite in list(self.sprites.items()):
+			first, last = self.patrol_chunks(sprite)
+			if not any(first <= index <= last for index in self.loaded):
+				sprite.kill()
+				del self.sprites[key]
@@ -1,29 +1,113 @@
-from os import walk
-from settings import tile_size
-from csv import reader
-import pygame
-
-
-# Import a folder of images to be used for animations
-def import_folder(path):
-	surface_list = []
-
-	for _, __, image_files in walk(path):
-		#print(image_files)
-		for image in image_files:
-			full_path = path + '/' + image
-			image_surface = pygame.image.load(full_path).convert_alpha()
-			image_surface = pygame.transform.scale(image_surface, (tile_size, tile_size))
-			surface_list.append(image_surface)
-
-	return surface_list
-
-
-# Import level .csv data and convert it to terrain map
-def import_csv_layout(path):
-	terrain_map = []
-	with open(path) as map:
-		level = reader(map, delimiter = ',')
-		for row in level:
-			terrain_map.append(list(row))
-		return terrain_map
+from os import walk, path as os_path
+from array import array
+from settings import tile_size
+from csv import reader
+from assets import load_image
+from level_data import layer_names
+from level_compiler import load_compiled_level
+from tmx import load_tmx
+
+
+# Image paths found in each folder. Folders don't change while the game
+# runs, so each one is only listed once
+folder_cache = {}
+
+
+# List the paths of the images in a folder
+def folder_images(path):
+	image_paths = folder_cache.get(path)
+	if image_paths is not None:
+		return image_paths
+
+	image_paths = []
+	for _, __, image_files in walk(path):
+		#print(image_files)
+		for image in image_files:
+			image_paths.append(path + '/' + image)
+
+	folder_cache[path] = image_paths
+	return image_paths
+
+
+# Import a folder of images to be used for animations. Images are scaled
+# to size (defaults to one tile) and optionally flipped horizontally
+def import_folder(path, size = None, flip = False):
+	surface_list = []
+	if size is None:
+		size = (tile_size, tile_size)
+
+	for full_path in folder_images(path):
+		image_surface = load_image(full_path, size, flip)
+		surface_list.append(image_surface)
+
+	return surface_list
+
+
+# Import level .csv data and convert it to terrain map of tile values
+def import_csv_layout(path):
+	terrain_map = []
+	with open(path) as map:
+		level = reader(map, delimiter = ',')
+		for row in level:
+			terrain_map.append([int(val) for val in row])
+		return terrain_map
+
+
+# Store a layout as rows of 16-bit integers, which takes a fraction of the
+# memory of lists of Python ints
+def compact_layout(layout):
+	return [array('h', row) for row in layout]
+
+
+# Set of the tile values used in a layout
+def layout_values(layout):
+	return {val for row in layout for val in row if val != -1}
+
+
+# Create a layout with no tiles in it
+def empty_layout(rows, cols):
+	return [[-1] * cols for _ in range(rows)]
+
+
+# Load a level's layers from its source files. The Tiled .tmx map is read
+# in one pass if the level has one. Layers the map doesn't have are read
+# from their exported .csv file, and layers with no file at all (eg, a
+# level without moving platforms) are empty. The map always takes
+# precedence, so a level loads the same however its files were copied
+def load_source_layouts(level_data):
+	layouts = {}
+	tmx_path = level_data.get('tmx', '')
+	if os_path.exists(tmx_path):
+		layouts = load_tmx(tmx_path)
+
+	for name in layer_names:
+		if name not in layouts and os_path.exists(level_data[name]):
+			layouts[name] = import_csv_layout(level_data[name])
+
+	return fill_missing_layers(layouts)
+
+
+# Add an empty layout for each layer that's missing, sized to match the
+# level's terrain
+def fill_missing_layers(layouts):
+	size_layout = layouts.get('terrain') or next(iter(layouts.values()))
+	for name in layer_names:
+		if name not in layouts:
+			layouts[name] = empty_layout(len(size_layout), len(size_layout[0]))
+	return layouts
+
+
+# Load the layouts of all of a level's layers. If the level has been
+# compiled with level_compiler.py, and the compiled file is newer than the
+# level's source files, the compiled file is memory-mapped instead of
+# parsing the .tmx or .csv files
+def load_level_layouts(level_data):
+	compiled_path = level_data.get('compiled')
+	if compiled_path and os_path.exists(compiled_path):
+		compiled_time = os_path.getmtime(compiled_path)
+		sources = [level_data[name] for name in layer_names] + [level_data.get('tmx', '')]
+		source_times = [os_path.getmtime(source) for source in sources if os_path.exists(source)]
+		if all(source_time <= compiled_time for source_time in source_times):
+			return fill_missing_layers(load_compiled_level(compiled_path))
+
+	return load_source_layouts(level_data)
\ No newline at end of file
@@ -0,0 +1,168 @@
+import pygame
+from array import array
+from settings import tile_size
+from support import compact_layout
+
+class TileGrid:
+
+	# Spatial index over a layer's layout, which is already a regular
+	# tile_size grid. Finding the tiles a rect overlaps only means looking
+	# at the handful of cells under it. Empty cells have a value of -1
+	def __init__(self, layout):
+		self.cells = layout
+		self.rows = len(layout)
+		self.cols = len(layout[0]) if layout else 0
+
+
+	def get(self, col, row):
+		if 0 <= row < self.rows and 0 <= col < self.cols:
+			return self.cells[row][col]
+		return -1
+
+
+	# Return (col, row, value) of every non-empty cell the rect overlaps,
+	# row by row
+	def cells_in(self, rect):
+		first_col = max(rect.left // tile_size, 0)
+		last_col = min((rect.right - 1) // tile_size, self.cols - 1)
+		first_row = max(rect.top // tile_size, 0)
+		last_row = min((rect.bottom - 1) // tile_size, self.rows - 1)
+
+		found = []
+		for row in range(first_row, last_row + 1):
+			cells = self.cells[row]
+			for col in range(first_col, last_col + 1):
+				val = cells[col]
+				if val != -1:
+					found.append((col, row, val))
+		return found
+
+
+	# Return the rect of every non-empty cell the rect overlaps, row by row
+	# in the same order tiles are created in
+	def query(self, rect):
+		return [tile_rect(col, row) for col, row, _ in self.cells_in(rect)]
+
+
+	# Find the patrol range of a tile moving along one axis (direction 0 is
+	# horizontal, 1 is vertical). Searches outwards from the rect for the
+	# nearest occupied cell on each side, in any row/column the rect covers.
+	# Returns the (min, max) pixel positions the rect must stay between
+	def patrol_bounds(self, rect, direction):
+		first_col = rect.left // tile_size
+		last_col = (rect.right - 1) // tile_size
+		first_row = rect.top // tile_size
+		last_row = (rect.bottom - 1) // tile_size
+
+		if direction == 0:
+			lines = range(first_row, last_row + 1)
+			start, end, length = first_col, last_col, self.cols
+			occupied = lambda position, line: self.get(position, line) != -1
+		else:
+			lines = range(first_col, last_col + 1)
+			start, end, length = first_row, last_row, self.rows
+			occupied = lambda position, line: self.get(line, position) != -1
+
+		# No constraint on a side means the tile can keep going that way
+		min_bound = float('-inf')
+		max_bound = float('inf')
+
+		for position in range(start - 1, -1, -1):
+			if any(occupied(position, line) for line in lines):
+				min_bound = (position + 1) * tile_size
+				break
+
+		for position in range(end + 1, length):
+			if any(occupied(position, line) for line in lines):
+				max_bound = position * tile_size
+				break
+
+		return min_bound, max_bound
+
+
+class TileMap(TileGrid):
+
+	# A layer that never moves (terrain, fill, items, constraints), kept as
+	# rows of 16-bit tile values rather than a sprite per tile, so each cell
+	# costs two bytes. Images come from a table of tile value -> image
+	# shared by every cell with that value. Only things that move
+	# (player, enemies, moving platforms, portal) are sprites
+	def __init__(self, layout, images = None):
+		super().__init__(compact_layout(layout))
+		self.images = images if images is not None else {}
+
+
+	# Change a cell's value, eg, to -1 once an item is collected
+	def set(self, col, row, val):
+		self.cells[row][col] = val
+
+
+	# Number of non-empty cells
+	def count(self):
+		return sum(len(cells) - cells.count(-1) for cells in self.cells)
+
+
+class ColliderGrid:
+
+	# Solid cells of a layer merged into as few large rects as possible when
+	# the level loads, so a floor 60 tiles wide is one collider rather than
+	# 60, with no seams between tiles for the player to catch on. Each row's
+	# runs of contiguous cells become rects, and a run exactly below a rect
+	# of the row above extends it downwards instead.
+	# Each cell holds the index of the rect covering it, or -1 if empty
+	def __init__(self, layout):
+		self.rows = len(layout)
+		self.cols = len(layout[0]) if layout else 0
+		self.rects = []
+		self.cells = [array('i', [-1]) * self.cols for _ in range(self.rows)]
+
+		# Rect index of each run in the row above, by (start, end) column
+		above = {}
+		for row_index, row in enumerate(layout):
+			cells = self.cells[row_index]
+			runs = {}
+			col = 0
+			while col < self.cols:
+				if row[col] == -1:
+					col += 1
+					continue
+
+				start = col
+				while col < self.cols and row[col] != -1:
+					col += 1
+
+				index = above.get((start, col))
+				if index is None:
+					index = len(self.rects)
+					self.rects.append(pygame.Rect(start * tile_size, row_index * tile_size, (col - start) * tile_size, tile_size))
+				else:
+					self.rects[index].height += tile_size
+
+				runs[(start, col)] = index
+				cells[start:col] = array('i', [index]) * (col - start)
+			above = runs
+
+
+	# Return every merged rect covering a cell the rect overlaps, in the
+	# order they were created
+	def query(self, rect):
+		first_col = max(rect.left // tile_size, 0)
+		last_col = min((rect.right - 1) // tile_size, self.cols - 1)
+		first_row = max(rect.top // tile_size, 0)
+		last_row = min((rect.bottom - 1) // tile_size, self.rows - 1)
+
+		# Slicing with a negative end would count from the end of the row, so
+		# a rect off either end of the level has to be caught here
+		if first_col > last_col:
+			return []
+
+		indices = set()
+		for row in range(first_row, last_row + 1):
+			indices.update(self.cells[row][first_col:last_col + 1])
+		indices.discard(-1)
+		return [self.rects[index] for index in sorted(indices)]
+
+
+# World rect of a cell
+def tile_rect(col, row):
+	return pygame.Rect(col * tile_size, row * tile_size, tile_size, tile_size)
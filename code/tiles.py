@@ -1,68 +1,48 @@
-import pygame
-from support import import_folder
-from settings import screen_ratio
-
-class Tile(pygame.sprite.Sprite):
-
-	def __init__(self, width, height, x, y):
-		super().__init__()
-		self.image = pygame.Surface((width, height))
-		self.rect = self.image.get_rect(topleft = (x, y))
-
-
-	def update(self, x_shift):
-		self.rect.x += x_shift
-
-
-class StaticTile(Tile):
-	
-	def __init__(self, width, height, x, y, surface):
-		super().__init__(width, height, x, y)
-		self.image = surface
-
-
-class MovingTile(Tile):
-	
-	def __init__(self, width, height, x, y, surface, direction):
-		super().__init__(width, height, x, y)
-		self.image = surface
-		self.direction = direction
-		self.speed = int(screen_ratio * 3)
-
-
-	def move(self):
-		if self.direction == 0:
-			self.rect.x += self.speed
-		elif self.direction == 1:
-			self.rect.y += self.speed
-
-
-	def reverse_direction(self):
-		self.speed *= -1
-
-
-	def update(self, shift):
-		self.rect.x += shift
-		self.move()
-
-
-class AnimatedTile(Tile):
-
-	def __init__(self, width, height, x, y, surface, path_index):
-		super().__init__(width, height, x, y)
-		self.path = '../graphics/' + str(path_index)
-		self.frames = import_folder(self.path)
-		self.frame_index = 0
-		self.image = self.frames[self.frame_index]
-
-
-	def animate(self):
-		self.frame_index += 0.15
-		if self.frame_index >= len(self.frames):
-			self.frame_index = 0
-		self.image = self.frames[int(self.frame_index)]
-
-
-	def update(self, shift):
-		self.rect.x += shift
-		self.animate()
+import pygame
+from support import import_folder
+from entities import PatrolSprite
+from settings import screen_ratio, tick_rate, animation_fps
+
+class Tile(pygame.sprite.Sprite):
+
+	# Subclasses set the image
+	def __init__(self, width, height, x, y):
+		super().__init__()
+		self.rect = pygame.Rect(x, y, width, height)
+
+
+class StaticTile(Tile):
+	
+	def __init__(self, width, height, x, y, surface):
+		super().__init__(width, height, x, y)
+		self.image = surface
+
+
+class MovingTile(PatrolSprite):
+
+	# Platform that patrols back and forth. Its position and speed are kept
+	# in the level's platform store, which moves it
+	def __init__(self, width, height, x, y, surface, direction, store):
+		super().__init__(width, height, x, y, direction, int(screen_ratio * 3), store)
+		self.image = surface
+
+
+class AnimatedTile(Tile):
+
+	def __init__(self, width, height, x, y, surface, path_index):
+		super().__init__(width, height, x, y)
+		self.path = '../graphics/' + str(path_index)
+		self.frames = import_folder(self.path)
+		self.frame_index = 0
+		self.image = self.frames[self.frame_index]
+
+
+	def animate(self):
+		self.frame_index += animation_fps / tick_rate
+		if self.frame_index >= len(self.frames):
+			self.frame_index = 0
+		self.image = self.frames[int(self.frame_index)]
+
+
+	def update(self):
+		self.animate()
@@ -0,0 +1,63 @@
+import base64, gzip, struct, zlib
+from bisect import bisect_right
+import xml.etree.ElementTree as ElementTree
+
+# Tiled stores flip/rotation flags in the top bits of each gid
+gid_mask = 0x1FFFFFFF
+
+
+# Read a layer's <data> element into a flat list of gids. Supports csv,
+# base64 (uncompressed, zlib or gzip) and plain XML <tile> encodings
+def read_layer_data(data):
+	encoding = data.get('encoding')
+	compression = data.get('compression')
+
+	if encoding == 'csv':
+		return [int(gid) for gid in data.text.replace('\n', ',').split(',') if gid.strip()]
+
+	elif encoding == 'base64':
+		raw = base64.b64decode(data.text.strip())
+		if compression == 'zlib':
+			raw = zlib.decompress(raw)
+		elif compression == 'gzip':
+			raw = gzip.decompress(raw)
+		elif compression is not None:
+			raise ValueError(f'unsupported layer compression: {compression}')
+		return list(struct.unpack(f'<{len(raw) // 4}I', raw))
+
+	elif encoding is None:
+		return [int(tile.get('gid', 0)) for tile in data.findall('tile')]
+
+	raise ValueError(f'unsupported layer encoding: {encoding}')
+
+
+# Convert a gid to the tile's index in its own tileset, which is the value
+# Tiled writes when exporting a layer to .csv. Empty tiles are -1
+def tile_value(gid, first_gids):
+	gid &= gid_mask
+	if gid == 0:
+		return -1
+	return gid - first_gids[bisect_right(first_gids, gid) - 1]
+
+
+# Load every tile layer in a Tiled .tmx map in one pass. Returns a
+# dictionary of layer name to layout (rows of tile values), the same as
+# reading each layer's exported .csv file
+def load_tmx(path):
+	root = ElementTree.parse(path).getroot()
+	if root.get('infinite') == '1':
+		raise ValueError(f'{path}: infinite maps are not supported')
+
+	first_gids = sorted(int(tileset.get('firstgid')) for tileset in root.iter('tileset'))
+
+	layouts = {}
+	for layer in root.iter('layer'):
+		cols = int(layer.get('width'))
+		rows = int(layer.get('height'))
+
+		# Negative gids don't exist in Tiled, but treat them as empty
+		# rather than failing on hand-edited maps
+		values = [tile_value(gid, first_gids) if gid > 0 else -1 for gid in read_layer_data(layer.find('data'))]
+		layouts[layer.get('name')] = [values[row * cols:(row + 1) * cols] for row in range(rows)]
+
+	return layouts